@@ -1,4 +1,4 @@
-from web3 import Web3
+from web3 import Web3, AsyncWeb3
 from eth_account import Account
 import os
 from dotenv import load_dotenv
@@ -8,36 +8,240 @@ from typing import Dict, List, Optional, Any, AsyncGenerator, Generator
 import logging
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from solcx import compile_source, install_solc, get_installed_solc_versions
-from fastapi import FastAPI, HTTPException
+from langchain.memory import ConversationBufferWindowMemory
+from solcx import compile_standard, install_solc, get_installed_solc_versions
+from solcx.exceptions import SolcError
+from fastapi import FastAPI, HTTPException, Header
 from pydantic import BaseModel
 import uvicorn
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 import asyncio
 from web3.exceptions import ContractLogicError
+from web3._utils.events import get_event_data
+from eth_utils.abi import collapse_if_tuple
 from langchain_xai import ChatXAI
 from pathlib import Path
+from collections import OrderedDict
+import hashlib
+import threading
+import copy
+import re
+import uuid
+import signal
+import sqlite3
+import aiohttp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, suppress
+
+try:
+    # Optional: local gas profiling runs contracts on an in-process py-evm chain
+    from eth_tester import EthereumTester, PyEVMBackend
+except ImportError:
+    EthereumTester = None
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage process-wide resources for the lifetime of the app"""
+    # Build the shared agents (and probe solc) once, off the event loop
+    await asyncio.to_thread(agent_pool.start)
+    # SQLite stores are opened here rather than at import
+    for store in (job_manager.store, monitor_store, transfer_index):
+        await asyncio.to_thread(store.open)
+    await job_manager.start()
+    await provider_registry.start()
+    monitor_task = None
+    if os.getenv("MONITORING_ENABLED", "false").lower() == "true":
+        monitor_task = asyncio.create_task(agent_pool.manager.start_monitoring())
+    yield
+    if monitor_task is not None:
+        agent_pool.manager.stop_monitoring()
+        monitor_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await monitor_task
+    await provider_registry.stop()
+    await job_manager.stop()
+    for store in (job_manager.store, monitor_store, transfer_index):
+        store.close()
+    compile_executor.shutdown()
+
 # Create FastAPI app
 app = FastAPI(
     title="Smart Contract Generator API",
     description="API for generating and compiling smart contracts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Add exact-match LLM response cache
+class ResponseCache:
+    """Exact-match cache of model responses keyed by model, role and normalized prompt.
+
+    A bounded in-memory LRU tier is backed by an optional SQLite tier; entries in
+    both tiers expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+        if sqlite_path:
+            try:
+                self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Disabling SQLite response cache: {str(e)}")
+                self.db = None
+
+    @staticmethod
+    def make_key(model: str, role: str, prompt: str) -> str:
+        """Hash the model, agent role and whitespace-normalized prompt into a cache key"""
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{model}\0{role}\0{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self.entries[key]
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT response, created FROM responses WHERE key = ? AND created > ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    self.sqlite_hits += 1
+                    self._remember(key, row[0], row[1])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        if not response:
+            return
+
+        created = time.time()
+        with self.lock:
+            self._remember(key, response, created)
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                        (key, response, created)
+                    )
+                    self.db.execute("DELETE FROM responses WHERE created <= ?", (created - self.ttl,))
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Failed to persist LLM response: {str(e)}")
+
+    def _remember(self, key: str, response: str, created: float):
+        self.entries[key] = (response, created)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.memory_hits + self.sqlite_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'memory_hits': self.memory_hits,
+                'sqlite_hits': self.sqlite_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.sqlite_hits) / lookups, 4) if lookups else 0.0
+            }
+
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+    sqlite_path=os.getenv("LLM_CACHE_DB") or None
 )
 
+def get_model_name(llm: Any) -> str:
+    return getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or type(llm).__name__
+
+async def cached_ainvoke(llm: Any, role: str, prompt: str, use_cache: bool = True) -> str:
+    """Invoke the model through the response cache and return the response text.
+
+    With ``use_cache`` off the cache is bypassed for reading but refreshed with the new response.
+    """
+    key = ResponseCache.make_key(get_model_name(llm), role, prompt)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+
+    async with admission.limit('llm'):
+        response = await llm.ainvoke(prompt)
+    response_cache.put(key, response.content)
+    return response.content
+
+# Add bounded conversation memory
+class BoundedConversationMemory(ConversationBufferWindowMemory):
+    """Window memory that also stores at most ``k`` exchanges and an approximate token budget.
+
+    The stock window memory only limits what is returned; this one prunes what is kept,
+    so a long-lived agent's memory stays flat.
+    """
+
+    max_token_limit: int = 4000
+
+    @staticmethod
+    def estimate_tokens(text: Any) -> int:
+        # Roughly four characters per token, good enough for a budget
+        return len(str(text)) // 4
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        messages = self.chat_memory.messages
+        
+        excess = len(messages) - self.k * 2
+        if excess > 0:
+            del messages[:excess]
+        
+        # Drop whole exchanges (oldest first) until the history fits the budget
+        while (len(messages) > 2 and
+               sum(self.estimate_tokens(message.content) for message in messages) > self.max_token_limit):
+            del messages[:2]
+
+AGENT_MEMORY_WINDOW = int(os.getenv("AGENT_MEMORY_WINDOW", "5"))
+MEMORY_TOKEN_LIMIT = int(os.getenv("MEMORY_TOKEN_LIMIT", "4000"))
+
 class ContractAgent:
-    def __init__(self, name: str, role: str):
+    def __init__(self, name: str, role: str, llm: Optional[ChatXAI] = None):
         self.name = name
         self.role = role
-        self.llm = ChatXAI(model="grok-beta")
-        self.memory = ConversationBufferMemory(
+        self.llm = llm or ChatXAI(model="grok-beta")
+        self.use_cache = True
+        self.memory = BoundedConversationMemory(
             memory_key="chat_history",
             input_key="input",
-            return_messages=True
+            return_messages=True,
+            k=AGENT_MEMORY_WINDOW,
+            max_token_limit=MEMORY_TOKEN_LIMIT
         )
         
         self.chain = LLMChain(
@@ -77,18 +281,112 @@ class ContractAgent:
             input_variables=input_variables
         )
 
-    def process(self, input_text: str) -> str:
+    def fork(self, use_cache: bool = True) -> 'ContractAgent':
+        """Create a copy of this agent that shares the LLM client but has fresh memory"""
+        agent = type(self)(self.name, self.role, llm=self.llm)
+        agent.use_cache = use_cache
+        return agent
+
+    def build_inputs(self, input_text: str) -> Dict:
         if self.role == "Smart Contract Developer":
-            return self.chain.invoke({"input": input_text})['text']
+            return {"input": input_text}
         else:
-            return self.chain.invoke({
+            return {
                 "input": input_text,
                 "role": self.role
-            })['text']
+            }
+
+    def cache_key(self, inputs: Dict) -> str:
+        # Normalize each text before serializing; json.dumps would turn newlines into literal \n
+        normalized = {key: " ".join(value.split()) if isinstance(value, str) else value for key, value in inputs.items()}
+        # Prompts that render the conversation must only hit for the same conversation
+        if 'chat_history' in self.chain.prompt.input_variables:
+            messages = self.memory.load_memory_variables({})['chat_history']
+            normalized['chat_history'] = [f"{message.type}: {message.content}" for message in messages]
+        return ResponseCache.make_key(
+            get_model_name(self.llm),
+            self.role,
+            json.dumps(normalized, sort_keys=True, default=str)
+        )
+
+    def cached_response(self, inputs: Dict, key: str) -> Optional[str]:
+        if not self.use_cache:
+            return None
+        
+        response = response_cache.get(key)
+        if response is not None:
+            # Keep memory consistent with what the agent "said"
+            self.memory.save_context(inputs, {"text": response})
+        return response
+
+    def process(self, input_text: str) -> str:
+        inputs = self.build_inputs(input_text)
+        # Keyed before the call; the chain adds this exchange to memory
+        key = self.cache_key(inputs)
+        cached = self.cached_response(inputs, key)
+        if cached is not None:
+            return cached
+        
+        response = self.chain.invoke(inputs)['text']
+        response_cache.put(key, response)
+        return response
+
+    async def aprocess(self, input_text: str) -> str:
+        """Async variant of process that does not block the event loop"""
+        inputs = self.build_inputs(input_text)
+        key = self.cache_key(inputs)
+        cached = self.cached_response(inputs, key)
+        if cached is not None:
+            return cached
+        
+        async with admission.limit('llm'):
+            result = await self.chain.ainvoke(inputs)
+        response_cache.put(key, result['text'])
+        return result['text']
+
+    async def astream(self, input_text: str) -> AsyncGenerator[str, None]:
+        """Stream the response token by token, then record the exchange in memory"""
+        key = self.cache_key(self.build_inputs(input_text))
+        cached = self.cached_response(self.build_inputs(input_text), key)
+        if cached is not None:
+            yield cached
+            return
+        
+        inputs = self.chain.prep_inputs(self.build_inputs(input_text))
+        prompt_value = self.chain.prompt.format_prompt(
+            **{key: inputs[key] for key in self.chain.prompt.input_variables}
+        )
+        
+        # The model streams into a queue under the LLM slot, so a slow SSE consumer
+        # does not keep the slot after generation has finished
+        tokens: asyncio.Queue = asyncio.Queue()
+        
+        async def produce():
+            try:
+                async with admission.limit('llm'):
+                    async for chunk in self.llm.astream(prompt_value):
+                        if chunk.content:
+                            tokens.put_nowait(chunk.content)
+            finally:
+                tokens.put_nowait(None)
+        
+        producer = asyncio.ensure_future(produce())
+        chunks = []
+        try:
+            while (token := await tokens.get()) is not None:
+                chunks.append(token)
+                yield token
+            producer.result()
+        finally:
+            producer.cancel()
+        
+        response = "".join(chunks)
+        self.memory.save_context(inputs, {"text": response})
+        response_cache.put(key, response)
 
 class RequirementsParser:
-    def __init__(self):
-        self.llm = ChatXAI(model="grok-beta")
+    def __init__(self, llm: Optional[ChatXAI] = None):
+        self.llm = llm or ChatXAI(model="grok-beta")
         
         template = """You are an expert at understanding user requirements for smart contracts, even when they're vague or unclear.
         Extract contract requirements from the following user prompt and make reasonable assumptions where needed.
@@ -114,34 +412,65 @@ class RequirementsParser:
             verbose=True
         )
     
-    def parse(self, prompt: str) -> Dict:
+    def parse(self, prompt: str, use_cache: bool = True) -> Dict:
         try:
             # If prompt is empty or just whitespace, return default ERC20 config
             if not prompt or prompt.isspace():
-                return {
-                    'name': 'CustomToken',
-                    'type': 'ERC20',
-                    'features': [
-                        'Basic ERC20 functionality',
-                        'Mintable',
-                        'Burnable',
-                        'Pausable'
-                    ]
-                }
+                return self.default_requirements()
             
-            result = self.chain.invoke({"prompt": prompt})
-            return json.loads(result['text'])
+            key = ResponseCache.make_key(get_model_name(self.llm), "RequirementsParser", prompt)
+            text = response_cache.get(key) if use_cache else None
+            if text is None:
+                text = self.chain.invoke({"prompt": prompt})['text']
+                response_cache.put(key, text)
+            return json.loads(text)
         except Exception as e:
-            # Fallback to basic ERC20 if parsing fails
-            return {
-                'name': 'CustomToken',
-                'type': 'ERC20',
-                'features': [
-                    'Basic ERC20 functionality',
-                    'Mintable',
-                    'Burnable'
-                ]
-            }
+            return self.fallback_requirements()
+
+    async def aparse(self, prompt: str, use_cache: bool = True) -> Dict:
+        """Async variant of parse that does not block the event loop"""
+        try:
+            if not prompt or prompt.isspace():
+                return self.default_requirements()
+            
+            key = ResponseCache.make_key(get_model_name(self.llm), "RequirementsParser", prompt)
+            text = response_cache.get(key) if use_cache else None
+            if text is None:
+                async with admission.limit('llm'):
+                    text = (await self.chain.ainvoke({"prompt": prompt}))['text']
+                response_cache.put(key, text)
+            return json.loads(text)
+        except AdmissionRejected:
+            # Overload must reach the client, not turn the prompt into a default ERC20
+            raise
+        except Exception as e:
+            return self.fallback_requirements()
+
+    @staticmethod
+    def default_requirements() -> Dict:
+        return {
+            'name': 'CustomToken',
+            'type': 'ERC20',
+            'features': [
+                'Basic ERC20 functionality',
+                'Mintable',
+                'Burnable',
+                'Pausable'
+            ]
+        }
+
+    @staticmethod
+    def fallback_requirements() -> Dict:
+        # Fallback to basic ERC20 if parsing fails
+        return {
+            'name': 'CustomToken',
+            'type': 'ERC20',
+            'features': [
+                'Basic ERC20 functionality',
+                'Mintable',
+                'Burnable'
+            ]
+        }
 
 class ErrorHandler:
     @staticmethod
@@ -183,15 +512,402 @@ class ErrorHandler:
                 'resolution_action': 'fix_code'
             }
 
+    @staticmethod
+    def location_span(contract_code: str, diagnostic: Dict) -> Optional[tuple]:
+        """Convert a diagnostic's line/column range into string offsets"""
+        if not diagnostic.get('start_line'):
+            return None
+        
+        line_offsets = [0]
+        for line in contract_code.split('\n'):
+            line_offsets.append(line_offsets[-1] + len(line) + 1)
+        
+        try:
+            start = line_offsets[diagnostic['start_line'] - 1] + diagnostic['start_column'] - 1
+            end = line_offsets[diagnostic['end_line'] - 1] + diagnostic['end_column'] - 1
+        except IndexError:
+            return None
+        return (start, end) if 0 <= start <= end <= len(contract_code) else None
+
+    @staticmethod
+    def rewrite_diagnostic(contract_code: str, diagnostic: Dict) -> Optional[tuple]:
+        """Return (rule, start, end, replacement) for a diagnostic a local rule can fix"""
+        span = ErrorHandler.location_span(contract_code, diagnostic)
+        if not span:
+            return None
+        
+        start, end = span
+        text = contract_code[start:end]
+        message = diagnostic.get('message') or ''
+        
+        checksum = re.search(r'Correct checksummed address: "(0x[0-9a-fA-F]{40})"', message)
+        if checksum:
+            return ('address_checksum', start, end, checksum.group(1))
+        
+        if 'only available for objects of type "address payable"' in message and '.' in text:
+            base, member = text.rsplit('.', 1)
+            return ('payable_address', start, end, f"payable({base}).{member}")
+        
+        if message.startswith('Data location must be') and 'but none was given' in message:
+            declaration = re.match(r'^(\S+(?:\[\d*\])*)(\s+.*)?$', text, re.DOTALL)
+            if declaration:
+                return ('data_location', start, end, f"{declaration.group(1)} memory{declaration.group(2) or ''}")
+        
+        if '"now" has been deprecated' in message and text == 'now':
+            return ('deprecated_now', start, end, 'block.timestamp')
+        
+        if '"sha3" has been deprecated' in message and text == 'sha3':
+            return ('deprecated_sha3', start, end, 'keccak256')
+        
+        return None
+
+    @staticmethod
+    def apply_local_fixes(contract_code: str, compilation_result: Dict) -> Dict:
+        """Deterministically fix known compilation errors without calling the LLM.
+
+        Returns the rewritten code, the rules that fired and, for a missing
+        compiler, the solc version that has to be installed before recompiling.
+        """
+        classification = ErrorHandler.handle_compilation_error(compilation_result.get('message', ''))
+        applied = []
+        
+        if classification['resolution_action'] == 'install_compiler':
+            return {
+                'contract_code': contract_code,
+                'applied': ['install_compiler'],
+                'install_version': classification['version']
+            }
+        
+        rewrites = []
+        for diagnostic in compilation_result.get('diagnostics', []):
+            if diagnostic['severity'] != 'error':
+                continue
+            rewrite = ErrorHandler.rewrite_diagnostic(contract_code, diagnostic)
+            if rewrite:
+                rewrites.append(rewrite)
+        
+        # Apply from the end of the file so earlier offsets stay valid; skip overlaps
+        last_start = len(contract_code) + 1
+        for rule, start, end, replacement in sorted(rewrites, key=lambda r: r[1], reverse=True):
+            if end > last_start:
+                continue
+            contract_code = contract_code[:start] + replacement + contract_code[end:]
+            last_start = start
+            applied.append(rule)
+        
+        # Pragma rewrite goes last so diagnostic positions above still match the code
+        if classification['resolution_action'] == 'adjust_version':
+            contract_code, count = re.subn(
+                r'pragma\s+solidity\s+[^;]+;', 'pragma solidity ^0.8.20;', contract_code
+            )
+            if count:
+                applied.append('adjust_version')
+        
+        return {
+            'contract_code': contract_code,
+            'applied': applied,
+            'install_version': None
+        }
+
+# Add AST-based static security pre-screen
+class StaticSecurityAnalyzer:
+    """Pattern-based security pre-screen over the solc AST.
+
+    Flags tx.origin authorization, external calls before state writes, unchecked
+    low-level calls, unprotected selfdestruct and unprotected mint/burn. The rules
+    only cover these shapes, so the result is conclusive only when critical issues
+    were found; a clean pre-screen still goes to the LLM analyzer.
+    """
+
+    LOW_LEVEL_CALLS = ('call', 'delegatecall', 'staticcall', 'send')
+    ACCESS_CONTROL = re.compile(r'only|owner|admin|role|auth|minter|burner', re.IGNORECASE)
+    REENTRANCY_GUARD = re.compile(r'reentr|lock|mutex', re.IGNORECASE)
+
+    @staticmethod
+    def walk(node: Any, parent: Optional[Dict] = None):
+        """Yield (node, parent) for every AST node below ``node``"""
+        if isinstance(node, dict):
+            if 'nodeType' in node:
+                yield node, parent
+                parent = node
+            for value in node.values():
+                yield from StaticSecurityAnalyzer.walk(value, parent)
+        elif isinstance(node, list):
+            for item in node:
+                yield from StaticSecurityAnalyzer.walk(item, parent)
+
+    @staticmethod
+    def offset(node: Dict) -> int:
+        return int(node.get('src', '0:0:0').split(':')[0])
+
+    @staticmethod
+    def is_member(node: Dict, base: str, member: str) -> bool:
+        expression = node.get('expression') or {}
+        return (node.get('nodeType') == 'MemberAccess' and node.get('memberName') == member and
+                expression.get('nodeType') == 'Identifier' and expression.get('name') == base)
+
+    @staticmethod
+    def callee(call: Dict) -> Dict:
+        expression = call.get('expression') or {}
+        # Unwrap call options such as .call{value: amount}(...)
+        if expression.get('nodeType') == 'FunctionCallOptions':
+            expression = expression.get('expression') or {}
+        return expression
+
+    @staticmethod
+    def type_string(node: Dict) -> str:
+        return (node.get('typeDescriptions') or {}).get('typeString') or ''
+
+    def call_kind(self, call: Dict) -> Optional[str]:
+        """Classify a FunctionCall as a low-level call, transfer or external contract call"""
+        callee = self.callee(call)
+        if callee.get('nodeType') != 'MemberAccess':
+            return None
+        
+        base_type = self.type_string(callee.get('expression') or {})
+        if base_type.startswith('address'):
+            if callee.get('memberName') in self.LOW_LEVEL_CALLS:
+                return callee['memberName']
+            if callee.get('memberName') == 'transfer':
+                return 'transfer'
+        elif base_type.startswith('contract ') and call.get('kind') == 'functionCall':
+            return 'external'
+        return None
+
+    def state_write_target(self, node: Dict, state_ids: set) -> bool:
+        if node.get('nodeType') == 'Assignment':
+            target = node.get('leftHandSide') or {}
+        elif node.get('nodeType') == 'UnaryOperation' and node.get('operator') in ('++', '--', 'delete'):
+            target = node.get('subExpression') or {}
+        else:
+            return False
+        
+        while target.get('nodeType') in ('IndexAccess', 'MemberAccess'):
+            target = target.get('baseExpression') or target.get('expression') or {}
+        return target.get('nodeType') == 'Identifier' and target.get('referencedDeclaration') in state_ids
+
+    def state_root(self, node: Dict, state_ids: set) -> bool:
+        """Whether an expression reads stored state, e.g. owner, roles[x] or config.admin"""
+        while node.get('nodeType') in ('IndexAccess', 'MemberAccess'):
+            node = node.get('baseExpression') or node.get('expression') or {}
+        return node.get('nodeType') == 'Identifier' and node.get('referencedDeclaration') in state_ids
+
+    def in_condition(self, node: Dict, parents: Dict) -> bool:
+        """Whether ``node`` sits in a require/assert argument or an if condition"""
+        child, ancestor = node, parents.get(id(node))
+        while ancestor is not None:
+            if ancestor.get('nodeType') == 'IfStatement':
+                return ancestor.get('condition') is child
+            if ancestor.get('nodeType') == 'FunctionCall':
+                if (ancestor.get('expression') or {}).get('name') in ('require', 'assert'):
+                    return True
+            child, ancestor = ancestor, parents.get(id(ancestor))
+        return False
+
+    def is_sender_check(self, node: Dict, state_ids: set) -> bool:
+        """msg.sender compared with stored state (owner, admin()) or looked up in a stored role mapping"""
+        if node.get('nodeType') == 'BinaryOperation' and node.get('operator') in ('==', '!='):
+            operands = [node.get('leftExpression') or {}, node.get('rightExpression') or {}]
+            for sender, other in (operands, operands[::-1]):
+                if not self.is_member(sender, 'msg', 'sender'):
+                    continue
+                if self.state_root(other, state_ids):
+                    return True
+                callee = other.get('expression') or {}
+                if (other.get('nodeType') == 'FunctionCall' and callee.get('nodeType') == 'Identifier' and
+                        self.ACCESS_CONTROL.search(callee.get('name', ''))):
+                    return True
+        if node.get('nodeType') == 'IndexAccess':
+            return (self.is_member(node.get('indexExpression') or {}, 'msg', 'sender') and
+                    self.state_root(node, state_ids))
+        return False
+
+    def is_access_controlled(self, function: Dict, nodes: List[tuple], parents: Dict, state_ids: set) -> bool:
+        for modifier in function.get('modifiers') or []:
+            if self.ACCESS_CONTROL.search((modifier.get('modifierName') or {}).get('name', '')):
+                return True
+        
+        for node, _ in nodes:
+            # Calls such as _checkOwner() or hasRole(...) count as access control
+            if node.get('nodeType') == 'FunctionCall':
+                callee = node.get('expression') or {}
+                if callee.get('nodeType') == 'Identifier' and self.ACCESS_CONTROL.search(callee.get('name', '')):
+                    return True
+            
+            if self.is_sender_check(node, state_ids) and self.in_condition(node, parents):
+                return True
+        return False
+
+    def acts_only_on_sender(self, nodes: List[tuple], writes: List[Dict], state_ids: set) -> bool:
+        """Whether every balance the function touches belongs to msg.sender, as in a self-burn"""
+        touched = False
+        for write in writes:
+            target = write.get('leftHandSide') or write.get('subExpression') or {}
+            while target.get('nodeType') in ('IndexAccess', 'MemberAccess'):
+                if target['nodeType'] == 'IndexAccess':
+                    if not self.is_member(target.get('indexExpression') or {}, 'msg', 'sender'):
+                        return False
+                    touched = True
+                target = target.get('baseExpression') or target.get('expression') or {}
+        
+        for node, _ in nodes:
+            callee = node.get('expression') or {}
+            if (node.get('nodeType') == 'FunctionCall' and callee.get('nodeType') == 'Identifier' and
+                    re.search(r'mint|burn|transfer', callee.get('name', ''), re.IGNORECASE)):
+                arguments = node.get('arguments') or []
+                if not arguments or not self.is_member(arguments[0], 'msg', 'sender'):
+                    return False
+                touched = True
+        return touched
+
+    def analyze(self, ast: Optional[Dict], contract_code: str) -> Dict:
+        findings = []
+        risky_constructs = set()
+        source_bytes = contract_code.encode('utf-8')
+        
+        def report(issue: str, severity: str, function: Dict, node: Dict, description: str, recommendation: str):
+            findings.append({
+                'issue': issue,
+                'severity': severity,
+                'function': function.get('name') or function.get('kind'),
+                'line': offset_to_position(source_bytes, self.offset(node))[0],
+                'description': description,
+                'recommendation': recommendation
+            })
+        
+        if not ast:
+            return {
+                'critical_issues': [],
+                'other_issues': [],
+                'recommendations': {},
+                'explanation': 'No AST available for static analysis',
+                'conclusive': False
+            }
+        
+        contracts = [node for node, _ in self.walk(ast) if node['nodeType'] == 'ContractDefinition']
+        state_ids = {
+            node['id'] for contract in contracts for node in contract.get('nodes', [])
+            if node.get('nodeType') == 'VariableDeclaration' and node.get('stateVariable')
+        }
+        
+        for contract in contracts:
+            for function in contract.get('nodes', []):
+                if function.get('nodeType') != 'FunctionDefinition' or not function.get('body'):
+                    continue
+                
+                nodes = list(self.walk(function['body'], function))
+                parents = {id(node): parent for node, parent in nodes}
+                is_public = function.get('visibility') in ('public', 'external')
+                calls = []
+                writes = []
+                
+                for node, parent in nodes:
+                    node_type = node['nodeType']
+                    if node_type in ('InlineAssembly', 'UncheckedBlock'):
+                        risky_constructs.add(node_type)
+                    
+                    if self.is_member(node, 'tx', 'origin'):
+                        risky_constructs.add('tx.origin')
+                        if parent and parent.get('nodeType') == 'BinaryOperation' and parent.get('operator') in ('==', '!='):
+                            report('tx_origin_auth', 'critical', function, node,
+                                   'tx.origin is used for authorization, which phishing contracts can bypass',
+                                   'Compare against msg.sender instead of tx.origin')
+                        else:
+                            report('tx_origin_use', 'medium', function, node,
+                                   'tx.origin is used; it is rarely the right identity to rely on',
+                                   'Use msg.sender unless the original EOA is really needed')
+                    
+                    if self.state_write_target(node, state_ids):
+                        writes.append(node)
+                    
+                    if node_type != 'FunctionCall':
+                        continue
+                    
+                    callee = node.get('expression') or {}
+                    if callee.get('nodeType') == 'Identifier' and callee.get('name') in ('selfdestruct', 'suicide'):
+                        risky_constructs.add('selfdestruct')
+                        if is_public and not self.is_access_controlled(function, nodes, parents, state_ids):
+                            report('unprotected_selfdestruct', 'critical', function, node,
+                                   'Anyone can call this function and destroy the contract',
+                                   'Restrict the function to the owner, e.g. with an onlyOwner modifier')
+                    
+                    kind = self.call_kind(node)
+                    if not kind:
+                        continue
+                    calls.append((kind, node))
+                    if kind != 'transfer':
+                        risky_constructs.add(kind)
+                    
+                    if kind in self.LOW_LEVEL_CALLS:
+                        unchecked = parent and parent.get('nodeType') == 'ExpressionStatement'
+                        if parent and parent.get('nodeType') == 'VariableDeclarationStatement':
+                            success = (parent.get('declarations') or [None])[0]
+                            unchecked = not success or not any(
+                                other.get('nodeType') == 'Identifier' and other.get('referencedDeclaration') == success['id']
+                                for other, _ in nodes
+                            )
+                        if unchecked:
+                            report('unchecked_call', 'critical', function, node,
+                                   f'The return value of low-level {kind} is not checked, so failures pass silently',
+                                   'Check the success flag, e.g. require(success, "call failed")')
+                
+                # External call followed by a state write is the classic reentrancy shape
+                guarded = any(
+                    self.REENTRANCY_GUARD.search((modifier.get('modifierName') or {}).get('name', ''))
+                    for modifier in function.get('modifiers') or []
+                )
+                if not guarded:
+                    for kind, call in calls:
+                        later_writes = [write for write in writes if self.offset(write) > self.offset(call)]
+                        if later_writes:
+                            severity = 'medium' if kind in ('transfer', 'send') else 'critical'
+                            report('reentrancy', severity, function, call,
+                                   'State is written after an external call, allowing reentrancy',
+                                   'Apply checks-effects-interactions: update state before the call, or add a reentrancy guard')
+                            break
+                
+                name = (function.get('name') or '').lstrip('_').lower()
+                # Burning your own balance is the standard ERC-20 self-burn, not a privileged operation
+                self_burn = name.startswith('burn') and self.acts_only_on_sender(nodes, writes, state_ids)
+                if (is_public and (name.startswith('mint') or name.startswith('burn')) and not self_burn and
+                        function.get('stateMutability') not in ('view', 'pure') and
+                        not self.is_access_controlled(function, nodes, parents, state_ids)):
+                    report('missing_access_control', 'critical', function, function,
+                           f'{function["name"]} is callable by anyone without access control',
+                           'Restrict the function with an access-control modifier or a msg.sender check')
+        
+        critical_issues = [finding for finding in findings if finding['severity'] == 'critical']
+        other_issues = [finding for finding in findings if finding['severity'] != 'critical']
+        conclusive = bool(critical_issues)
+        
+        if critical_issues:
+            explanation = f'Static analysis found {len(critical_issues)} critical issue(s).'
+        elif not risky_constructs:
+            explanation = 'Static analysis found no external calls, assembly, selfdestruct or tx.origin use, and no critical issues.'
+        else:
+            explanation = f'Static analysis was inconclusive; risky constructs present: {", ".join(sorted(risky_constructs))}.'
+        
+        return {
+            'critical_issues': critical_issues,
+            'other_issues': other_issues,
+            'recommendations': {
+                f"{finding['issue']} ({finding['function']}, line {finding['line']})": finding['recommendation']
+                for finding in findings
+            },
+            'explanation': explanation,
+            'conclusive': conclusive
+        }
+
 class ContractManager:
     def __init__(self):
-        self.developer = ContractAgent("Developer", "Smart Contract Developer")
-        self.analyzer = ContractAgent("Analyzer", "Smart Contract Security Analyst")
-        self.coordinator = ContractAgent("Coordinator", "Project Coordinator")
-        self.planner = ContractAgent("Planner", "Project Planner")
-        self.parser = RequirementsParser()
-        self.logger = logging.getLogger(__name__)
+        # A single client is shared by every agent owned by this manager
         self.llm = ChatXAI(model="grok-beta")
+        self.developer = ContractAgent("Developer", "Smart Contract Developer", llm=self.llm)
+        self.analyzer = ContractAgent("Analyzer", "Smart Contract Security Analyst", llm=self.llm)
+        self.coordinator = ContractAgent("Coordinator", "Project Coordinator", llm=self.llm)
+        self.planner = ContractAgent("Planner", "Project Planner", llm=self.llm)
+        self.parser = RequirementsParser(llm=self.llm)
+        self.logger = logging.getLogger(__name__)
         
         try:
             if '0.8.20' not in get_installed_solc_versions():
@@ -199,61 +915,155 @@ class ContractManager:
         except Exception as e:
             self.logger.warning(f"Failed to initialize solc compiler: {str(e)}")
         
-        self.error_recovery = AutoErrorRecovery()
-        self.optimizer = ContractOptimizer()
-        self.monitoring_interval = 60  # seconds
+        self.error_recovery = AutoErrorRecovery(llm=self.llm)
+        self.static_analyzer = StaticSecurityAnalyzer()
+        self.optimizer = ContractOptimizer(llm=self.llm)
+        self.monitoring_interval = int(os.getenv("MONITOR_INTERVAL", "60"))  # seconds
         self.monitoring_active = False
+        self.speculative_fixes = int(os.getenv("SPECULATIVE_FIX_CANDIDATES", "1"))
+        self.monitor_concurrency = int(os.getenv("MONITOR_CONCURRENCY", "32"))
+        self.monitor_chain_concurrency = int(os.getenv("MONITOR_CHAIN_CONCURRENCY", "8"))
+        self.monitor_lock: Optional[asyncio.Lock] = None
+        self.monitoring_stats = {
+            'cycles': 0,
+            'skipped_cycles': 0,
+            'overruns': 0,
+            'last_duration': None,
+            'last_contracts': 0,
+            'last_failures': 0
+        }
+        self.use_cache = True
+        # Contract generation is sampled, so replaying a cached contract is opt-in
+        self.cache_generation = os.getenv("LLM_CACHE_DEVELOPER", "false").lower() == "true"
+
+    def for_request(self, use_cache: bool = True) -> 'ContractManager':
+        """Create a per-request view that shares long-lived objects but isolates agent memory"""
+        session = copy.copy(self)
+        session.use_cache = use_cache
+        session.developer = self.developer.fork(use_cache and self.cache_generation)
+        session.analyzer = self.analyzer.fork(use_cache)
+        session.coordinator = self.coordinator.fork(use_cache)
+        session.planner = self.planner.fork(use_cache)
+        # Attempt counts are per request; a shared counter would lock out later requests
+        session.error_recovery = self.error_recovery.fork()
+        return session
         
     async def start_monitoring(self):
         """Start autonomous contract monitoring"""
         self.monitoring_active = True
         while self.monitoring_active:
+            started = time.monotonic()
             try:
                 await self.monitor_contracts()
-                await asyncio.sleep(self.monitoring_interval)
             except Exception as e:
                 self.logger.error(f"Monitoring error: {str(e)}")
+            # Keep a fixed cadence; a cycle that overran starts the next one immediately
+            await asyncio.sleep(max(0, self.monitoring_interval - (time.monotonic() - started)))
                 
+    def stop_monitoring(self):
+        self.monitoring_active = False
+
+    async def get_monitored_contracts(self) -> List[Dict]:
+        """Registered contracts with the RPC endpoint of their chain; chains no longer supported are skipped"""
+        contracts = []
+        for contract in await asyncio.to_thread(monitor_store.list_contracts):
+            chain_config = chain_config_for(contract['chain_id'])
+            if chain_config is None:
+                self.logger.warning(f"Skipping {contract['address']}: chain {contract['chain_id']} is not supported")
+                continue
+            contracts.append({**contract, 'network_url': chain_config['rpc_url']})
+        return contracts
+
+    async def store_monitoring_results(self, chain_id: int, address: str, health_check: Dict):
+        await asyncio.to_thread(monitor_store.add_result, chain_id, address, health_check)
+
     async def monitor_contracts(self):
-        """Autonomously monitor deployed contracts"""
-        try:
-            # Get list of contracts to monitor from database/storage
-            monitored_contracts = await self.get_monitored_contracts()
-            
-            for contract in monitored_contracts:
-                # Create Web3 contract instance
-                w3 = Web3(Web3.HTTPProvider(contract['network_url']))
-                contract_instance = w3.eth.contract(
-                    address=w3.to_checksum_address(contract['address']),
-                    abi=contract['abi']
-                )
-                
-                # Check contract health metrics
-                health_check = await self.check_contract_health(
-                    contract_instance, 
-                    contract['monitoring_config']
-                )
+        """Autonomously monitor deployed contracts, bounded globally and per chain"""
+        if self.monitor_lock is None:
+            self.monitor_lock = asyncio.Lock()
+        if self.monitor_lock.locked():
+            self.monitoring_stats['skipped_cycles'] += 1
+            self.logger.warning("Previous monitoring cycle is still running, skipping this one")
+            return
+        
+        async with self.monitor_lock:
+            started = time.monotonic()
+            monitored_contracts = []
+            failures = 0
+            try:
+                # Get list of contracts to monitor from database/storage
+                monitored_contracts = await self.get_monitored_contracts()
                 
-                if health_check['alerts']:
-                    await self.handle_contract_alerts(
-                        contract['address'], 
-                        health_check['alerts']
+                global_limit = asyncio.Semaphore(self.monitor_concurrency)
+                chain_limits: Dict[str, asyncio.Semaphore] = {}
+                for contract in monitored_contracts:
+                    chain_limits.setdefault(
+                        contract['network_url'],
+                        asyncio.Semaphore(self.monitor_chain_concurrency)
                     )
                 
-                # Store monitoring results
-                await self.store_monitoring_results(
-                    contract['address'],
-                    health_check
-                )
+                results = await asyncio.gather(*(
+                    self.monitor_contract(contract, global_limit, chain_limits[contract['network_url']])
+                    for contract in monitored_contracts
+                ), return_exceptions=True)
                 
-        except Exception as e:
-            self.logger.error(f"Contract monitoring failed: {str(e)}")
-            await self.handle_error(str(e), {
-                'stage': 'contract_monitoring',
-                'context': 'Periodic health check'
-            })
+                for contract, result in zip(monitored_contracts, results):
+                    if isinstance(result, Exception):
+                        failures += 1
+                        self.logger.error(f"Monitoring {contract['address']} failed: {str(result)}")
+                    
+            except Exception as e:
+                self.logger.error(f"Contract monitoring failed: {str(e)}")
+                await self.handle_error(str(e), {
+                    'stage': 'contract_monitoring',
+                    'context': 'Periodic health check'
+                })
+            finally:
+                duration = time.monotonic() - started
+                self.monitoring_stats['cycles'] += 1
+                self.monitoring_stats['last_duration'] = round(duration, 3)
+                self.monitoring_stats['last_contracts'] = len(monitored_contracts)
+                self.monitoring_stats['last_failures'] = failures
+                if duration > self.monitoring_interval:
+                    self.monitoring_stats['overruns'] += 1
+                    self.logger.warning(
+                        f"Monitoring cycle took {duration:.1f}s for {len(monitored_contracts)} contracts, "
+                        f"longer than the {self.monitoring_interval}s interval"
+                    )
+
+    async def monitor_contract(self, contract: Dict, global_limit: asyncio.Semaphore,
+                               chain_limit: asyncio.Semaphore):
+        """Check, alert on and store the health of one monitored contract"""
+        # Take the chain slot first so waiting on a busy chain does not hold a global slot
+        async with chain_limit, global_limit:
+            # Create Web3 contract instance on the shared provider
+            w3 = await provider_registry.for_url(contract['network_url'])
+            contract_instance = w3.eth.contract(
+                address=w3.to_checksum_address(contract['address']),
+                abi=contract['abi']
+            )
+            
+            # Check contract health metrics
+            health_check = await self.check_contract_health(
+                contract_instance, 
+                contract['monitoring_config'],
+                chain_id=contract['chain_id']
+            )
+            
+            if health_check['alerts']:
+                await self.handle_contract_alerts(
+                    contract['address'], 
+                    health_check['alerts']
+                )
+            
+            # Store monitoring results
+            await self.store_monitoring_results(
+                contract['chain_id'],
+                contract['address'],
+                health_check
+            )
 
-    async def check_contract_health(self, contract: Any, config: Dict) -> Dict:
+    async def check_contract_health(self, contract: Any, config: Dict, chain_id: Optional[int] = None) -> Dict:
         """Check various health metrics of a deployed contract"""
         alerts = []
         metrics = {}
@@ -270,14 +1080,8 @@ class ContractManager:
                     'details': f'Contract balance ({balance}) below threshold'
                 })
             
-            # Check transaction volume
-            latest_block = await contract.web3.eth.block_number
-            start_block = latest_block - config.get('blocks_to_analyze', 1000)
-            
-            events = await contract.events.Transfer.get_logs(
-                fromBlock=start_block,
-                toBlock='latest'
-            )
+            # Check transaction volume over the locally indexed window; only new blocks are fetched
+            events = await transfer_index.sync(contract, config.get('blocks_to_analyze', 1000), chain_id)
             
             tx_volume = len(events)
             metrics['transaction_volume'] = tx_volume
@@ -328,35 +1132,59 @@ class ContractManager:
                 }]
             }
 
+    async def analyze_transaction_patterns(self, events: Any, window_blocks: int = 50, min_transfers: int = 20,
+                                           zscore_threshold: float = 3.0, concentration_threshold: float = 0.5) -> List[str]:
+        """Describe volume spikes, sender concentration and outsized transfers in an event window"""
+        window = events if isinstance(events, EventWindow) else EventWindow.from_events(events)
+        if len(window) < min_transfers:
+            return []
+        
+        patterns = []
+        zscore = window.volume_zscore(window_blocks)
+        if zscore > zscore_threshold:
+            patterns.append(
+                f'Transfer volume spike: the last {window_blocks} blocks are '
+                f'{zscore:.1f} standard deviations above the rolling mean'
+            )
+        
+        top_sender = window.top_senders(limit=1)
+        if top_sender and top_sender[0]['share'] > concentration_threshold:
+            patterns.append(
+                f"Sender concentration: {top_sender[0]['address']} sent "
+                f"{top_sender[0]['share']:.0%} of {len(window)} transfers"
+            )
+        
+        outliers = window.value_outliers(zscore_threshold)
+        if outliers:
+            patterns.append(f'{outliers} transfer(s) with unusually large values')
+        
+        return patterns
+
+    async def analyze_gas_usage(self, events: Any) -> Dict:
+        """Summarize gas used by the transactions in an event window"""
+        window = events if isinstance(events, EventWindow) else EventWindow.from_events(events)
+        gas_used = window.tx_gas_used()
+        if not len(gas_used):
+            return {'transactions': 0, 'average': 0, 'p50': 0, 'p90': 0, 'p99': 0, 'max': 0}
+        
+        p50, p90, p99 = np.percentile(gas_used, [50, 90, 99])
+        return {
+            'transactions': int(len(gas_used)),
+            'average': float(gas_used.mean()),
+            'p50': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': float(gas_used.max())
+        }
+
     async def handle_contract_alerts(self, contract_address: str, alerts: List[Dict]):
-        """Handle alerts from contract monitoring"""
+        """Log alerts from contract monitoring; they are persisted with the health check results.
+
+        No automated response is taken: there is no alert strategy to decide one yet.
+        """
         for alert in alerts:
-            try:
-                # Get alert handling strategy from AI
-                strategy = await self.get_alert_strategy(alert)
-                
-                if strategy['action_required']:
-                    if strategy['confidence_score'] >= 0.8:
-                        # Execute automated response
-                        await self.execute_alert_response(
-                            contract_address,
-                            alert,
-                            strategy['response_plan']
-                        )
-                    else:
-                        # Log for human review
-                        self.logger.warning(
-                            f"Alert requires human review: {json.dumps(alert)}\n"
-                            f"Suggested strategy: {json.dumps(strategy)}"
-                        )
-                
-                # Store alert for analysis
-                await self.store_alert(contract_address, alert, strategy)
-                
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to handle alert for {contract_address}: {str(e)}"
-                )
+            log = self.logger.error if alert.get('severity') == 'error' else self.logger.warning
+            log(f"Contract {contract_address} alert {alert.get('type')}: {alert.get('details')}")
 
     async def execute_recovery_plan(self, error: str, context: Dict, plan: Dict) -> Dict:
         """Execute an AI-generated recovery plan"""
@@ -408,7 +1236,7 @@ class ContractManager:
 
     async def handle_error(self, error: str, context: Dict) -> Dict:
         """Autonomously handle errors during contract operations"""
-        recovery_result = await self.error_recovery.attempt_recovery(error, context)
+        recovery_result = await self.error_recovery.attempt_recovery(error, context, use_cache=self.use_cache)
         
         if recovery_result['status'] == 'retry':
             self.logger.info(f"Attempting recovery: {recovery_result['recovery_plan']}")
@@ -460,12 +1288,7 @@ class ContractManager:
     def compile_with_remappings(self, contract_code: str) -> Dict:
         """Compile contract without remappings since we're not using external imports"""
         try:
-            temp_dir = Path("contract")
-            temp_dir.mkdir(exist_ok=True)
-            
-            contract_file = temp_dir / "contract.sol"
-            contract_file.write_text(contract_code)
-            
+            self.write_contract_file(contract_code)
             return compile_contract(contract_code)
         except Exception as e:
             self.logger.error(f"Compilation error: {str(e)}")
@@ -474,6 +1297,27 @@ class ContractManager:
                 'message': str(e)
             }
 
+    async def acompile_with_remappings(self, contract_code: str) -> Dict:
+        """Compile contract on the compile executor without blocking the event loop"""
+        try:
+            await asyncio.to_thread(self.write_contract_file, contract_code)
+            return await acompile_contract(contract_code)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            self.logger.error(f"Compilation error: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
+    def write_contract_file(self, contract_code: str):
+        temp_dir = Path("contract")
+        temp_dir.mkdir(exist_ok=True)
+        
+        contract_file = temp_dir / "contract.sol"
+        contract_file.write_text(contract_code)
+
     def process_user_prompt(self, prompt: str) -> Generator[str, None, None]:
         try:
             # First, let coordinator create a plan
@@ -650,6 +1494,77 @@ class ContractManager:
                 'contract_code': contract_code if 'contract_code' in locals() else None
             }
     
+    def scope_compile_errors(self, contract_code: str, diagnostics: List[Dict], context_lines: int = 8) -> Optional[Dict]:
+        """Pick the region of the contract around the compile errors, or None if a full rewrite is needed"""
+        errors = [d for d in diagnostics if d['severity'] == 'error' and d.get('start_line')]
+        if not errors:
+            return None
+        
+        lines = contract_code.splitlines()
+        start_line = max(1, min(d['start_line'] for d in errors) - context_lines)
+        end_line = min(len(lines), max(d['end_line'] for d in errors) + context_lines)
+        
+        # Scoping only pays off when the region is a small part of the contract
+        if end_line - start_line + 1 > len(lines) * 0.6:
+            return None
+        
+        return {
+            'start_line': start_line,
+            'end_line': end_line,
+            'region': "\n".join(
+                f"{number} | {lines[number - 1]}" for number in range(start_line, end_line + 1)
+            ),
+            'errors': "\n".join(
+                f"line {d['start_line']}, column {d['start_column']}: {d.get('type') or 'Error'}: {d['message']}"
+                for d in errors
+            )
+        }
+
+    async def generate_fix_candidates(self, fix_prompt: str, contract_code: str,
+                                      scope: Optional[Dict], count: int) -> List[str]:
+        """Request ``count`` fixes concurrently and return the distinct patched contracts.
+
+        Every candidate is a fresh sample: the candidates should differ, and a cached
+        fix may be one that already failed to compile.
+        """
+        agents = [self.developer.fork(use_cache=False) for _ in range(count)]
+        responses = await asyncio.gather(
+            *(agent.aprocess(fix_prompt) for agent in agents),
+            return_exceptions=True
+        )
+        
+        candidates = []
+        for response in responses:
+            if isinstance(response, Exception):
+                self.logger.warning(f"Fix candidate failed: {str(response)}")
+                continue
+            if scope:
+                candidates.append(self.apply_scoped_fix(contract_code, scope, response))
+            else:
+                candidates.append(self.extract_contract_code(response))
+        
+        if not candidates:
+            raise next(response for response in responses if isinstance(response, Exception))
+        return list(dict.fromkeys(candidates))
+
+    def apply_scoped_fix(self, contract_code: str, scope: Dict, response: str) -> str:
+        """Splice the AI's replacement for a scoped region back into the contract"""
+        replacement = self.extract_code_block(response).strip("\n")
+        
+        # The model sometimes ignores the scope and returns the whole contract
+        if "pragma solidity" in replacement and "pragma solidity" not in scope['region']:
+            return self.extract_contract_code(response)
+        
+        replacement_lines = replacement.splitlines()
+        numbered = re.compile(r'^\s*\d+ \| ?')
+        if replacement_lines and all(numbered.match(line) for line in replacement_lines if line.strip()):
+            replacement_lines = [numbered.sub('', line, count=1) for line in replacement_lines]
+        
+        lines = contract_code.splitlines()
+        return "\n".join(
+            lines[:scope['start_line'] - 1] + replacement_lines + lines[scope['end_line']:]
+        )
+
     def is_valid_solidity_code(self, code: str) -> bool:
         """Basic validation to ensure we have actual Solidity code"""
         code = code.strip()
@@ -661,8 +1576,8 @@ class ContractManager:
         ]
         return all(element in code for element in required_elements)
     
-    def extract_contract_code(self, response: str) -> str:
-        """Extract contract code from the AI response"""
+    def extract_code_block(self, response: str) -> str:
+        """Strip markdown code fences from an AI response"""
         if "```solidity" in response:
             code = response.split("```solidity")[1].split("```")[0]
         elif "```" in response:
@@ -670,10 +1585,12 @@ class ContractManager:
         else:
             code = response
             
-        code = code.strip()
-        
         # Remove any remaining code block markers
-        code = code.replace("```solidity", "").replace("```", "")
+        return code.replace("```solidity", "").replace("```", "")
+
+    def extract_contract_code(self, response: str) -> str:
+        """Extract contract code from the AI response"""
+        code = self.extract_code_block(response).strip()
         
         if not code.startswith("//") and not code.startswith("/*"):
             start_markers = ["// SPDX", "/*", "pragma"]
@@ -684,26 +1601,196 @@ class ContractManager:
         
         return code
 
-def compile_contract(contract_source: str, import_remappings: List[str] = None) -> Dict:
-    try:
-        # Simplified compilation arguments without remappings
-        compile_args = {
-            'output_values': ['abi', 'bin'],
-            'solc_version': '0.8.20'
+# Add content-addressed compilation cache
+class CompilationCache:
+    """Two-tier (in-memory LRU + on-disk) cache of successful compilation results.
+
+    Entries are keyed by a hash of the source, the solc version and the output
+    settings, so identical sources never spawn solc twice.
+    """
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                self.logger.warning(f"Disabling on-disk compilation cache: {str(e)}")
+                self.cache_dir = None
+
+    @staticmethod
+    def make_key(contract_source: str, solc_version: str, settings: Any) -> str:
+        """Hash the source, compiler version and output settings into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(solc_version.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(contract_source.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return self.entries[key]
+
+        if self.cache_dir:
+            try:
+                result = json.loads((self.cache_dir / f"{key}.json").read_text())
+            except (OSError, json.JSONDecodeError):
+                result = None
+            if result is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                self._remember(key, result)
+                return result
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict):
+        self._remember(key, result)
+
+        if self.cache_dir:
+            try:
+                # Write to a temp file first so readers never see partial entries
+                tmp_file = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+                tmp_file.write_text(json.dumps(result))
+                tmp_file.replace(self.cache_dir / f"{key}.json")
+            except OSError as e:
+                self.logger.warning(f"Failed to persist compilation result: {str(e)}")
+
+    def _remember(self, key: str, result: Dict):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+# Standard-JSON settings used for every compile; part of the cache key
+COMPILE_SETTINGS = {
+    'outputSelection': {
+        '*': {'*': ['abi', 'evm.bytecode.object'], '': ['ast']}
+    }
+}
+
+# Optimizer runs values tried by the optional settings sweep
+OPTIMIZER_RUNS_SWEEP = [1, 200, 1000, 10000]
+# Sweep candidates one request may have in the compile pool at once
+TUNING_CONCURRENCY = int(os.getenv("TUNING_CONCURRENCY", "2"))
+
+def optimizer_settings(runs: int, via_ir: bool, enabled: bool = True) -> Dict:
+    # The sweep also asks for runtime bytecode, which is what deployment pays to store
+    return {
+        'outputSelection': {
+            '*': {'*': ['abi', 'evm.bytecode.object', 'evm.deployedBytecode.object'], '': ['ast']}
+        },
+        'optimizer': {'enabled': enabled, 'runs': runs},
+        'viaIR': via_ir
+    }
+
+compilation_cache = CompilationCache(
+    max_entries=int(os.getenv("COMPILE_CACHE_SIZE", "256")),
+    cache_dir=os.getenv("COMPILE_CACHE_DIR", ".cache/compilation")
+)
+
+def offset_to_position(source_bytes: bytes, offset: int) -> tuple:
+    """Convert a solc byte offset into a 1-based (line, column) pair"""
+    prefix = source_bytes[:max(0, offset)].decode('utf-8', errors='ignore')
+    line = prefix.count('\n') + 1
+    column = len(prefix) - (prefix.rfind('\n') + 1) + 1
+    return line, column
+
+def parse_diagnostics(contract_source: str, errors: List[Dict]) -> List[Dict]:
+    """Turn standard-JSON errors into diagnostics with line and column ranges"""
+    source_bytes = contract_source.encode('utf-8')
+    diagnostics = []
+    for error in errors:
+        diagnostic = {
+            'severity': error.get('severity', 'error'),
+            'type': error.get('type'),
+            'message': error.get('message'),
+            'formatted_message': error.get('formattedMessage', error.get('message'))
         }
         
-        compiled_sol = compile_source(
-            contract_source,
-            **compile_args
-        )
+        location = error.get('sourceLocation')
+        if location and location.get('start', -1) >= 0:
+            diagnostic['file'] = location.get('file')
+            diagnostic['start_line'], diagnostic['start_column'] = offset_to_position(source_bytes, location['start'])
+            diagnostic['end_line'], diagnostic['end_column'] = offset_to_position(source_bytes, location['end'])
         
-        contract_id = list(compiled_sol.keys())[0]
-        contract_interface = compiled_sol[contract_id]
+        diagnostics.append(diagnostic)
+    return diagnostics
+
+def compile_contract(
+    contract_source: str,
+    import_remappings: List[str] = None,
+    solc_version: str = '0.8.20',
+    use_cache: bool = True,
+    settings: Optional[Dict] = None
+) -> Dict:
+    settings = settings or COMPILE_SETTINGS
+    # Standard-JSON input so errors come back with source locations
+    input_data = {
+        'language': 'Solidity',
+        'sources': {'contract.sol': {'content': contract_source}},
+        'settings': settings
+    }
+
+    cache_key = CompilationCache.make_key(contract_source, solc_version, settings)
+    if use_cache:
+        cached = compilation_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+    try:
+        output = compile_standard(input_data, solc_version=solc_version)
         
-        return {
+        contracts = output.get('contracts', {}).get('contract.sol', {})
+        contract_id = list(contracts.keys())[0]
+        contract_interface = contracts[contract_id]
+        
+        result = {
             'status': 'success',
             'abi': contract_interface['abi'],
-            'bytecode': contract_interface['bin']
+            'bytecode': contract_interface['evm']['bytecode']['object'],
+            'ast': output.get('sources', {}).get('contract.sol', {}).get('ast'),
+            'diagnostics': parse_diagnostics(contract_source, output.get('errors', []))
+        }
+        deployed_bytecode = contract_interface['evm'].get('deployedBytecode', {}).get('object')
+        if deployed_bytecode is not None:
+            result['deployed_bytecode'] = deployed_bytecode
+    except SolcError as e:
+        try:
+            errors = json.loads(e.stdout_data).get('errors', [])
+        except (TypeError, ValueError):
+            errors = []
+        return {
+            'status': 'error',
+            'message': str(e),
+            'diagnostics': parse_diagnostics(contract_source, errors)
         }
     except Exception as e:
         return {
@@ -711,14 +1798,456 @@ def compile_contract(contract_source: str, import_remappings: List[str] = None)
             'message': str(e)
         }
 
+    # Only successful results are cached; failures may be environmental (e.g. missing solc)
+    if use_cache:
+        compilation_cache.put(cache_key, result)
+    return dict(result)
+
+class CompileQueueFull(Exception):
+    """Raised when the compile executor already holds its maximum number of jobs"""
+    pass
+
+# Add bounded process pool for solc compilation
+class CompileExecutor:
+    """Runs compile jobs in a process pool so solc never blocks the event loop.
+
+    At most ``max_workers + max_queue`` jobs are admitted at once; anything beyond
+    that is rejected with ``CompileQueueFull``. A timeout recycles the pool, killing
+    its workers and their solc processes; other jobs that were in that pool are
+    retried once on the new one.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.logger = logging.getLogger(__name__)
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        # Created lazily so importing this module never forks workers
+        if self.pool is None:
+            # Each worker leads its own process group so solc dies with it on recycle
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=os.setpgrp if hasattr(os, 'setpgrp') else None
+            )
+        return self.pool
+
+    def recycle(self, pool: ProcessPoolExecutor):
+        """Kill ``pool``'s workers, including a stuck solc, and start fresh on the next job"""
+        if self.pool is pool:
+            self.pool = None
+        # The executor does not expose its workers; _processes is all there is
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        for process in processes:
+            with suppress(OSError):
+                if hasattr(os, 'killpg'):
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+        # Jobs still queued on the dead pool fail with BrokenProcessPool and are retried
+        pool.shutdown(wait=False)
+
+    async def run(self, fn, *args, timeout: Optional[float] = None) -> Any:
+        """Run ``fn(*args)`` in the pool and await its result"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise CompileQueueFull(
+                f'Compile queue is full ({self.pending} jobs pending)'
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                pool = self.get_pool()
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(pool, fn, *args), timeout or self.timeout
+                    )
+                except BrokenProcessPool:
+                    # A worker crashed, or another job's timeout recycled the pool
+                    if self.pool is pool:
+                        self.pool = None
+                    if attempt:
+                        raise
+                    self.logger.warning("Compile pool was broken, retrying on a new pool")
+                    continue
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    self.logger.warning("Compile job timed out, recycling the pool")
+                    self.recycle(pool)
+                    raise
+                
+                self.completed += 1
+                return result
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.max_workers,
+            'running': min(self.pending, self.max_workers),
+            'queued': max(0, self.pending - self.max_workers),
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+compile_executor = CompileExecutor(
+    max_workers=int(os.getenv("COMPILE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.getenv("COMPILE_QUEUE_LIMIT", "32")),
+    timeout=float(os.getenv("COMPILE_TIMEOUT", "60"))
+)
+
+async def acompile_contract(contract_source: str, solc_version: str = '0.8.20',
+                            settings: Optional[Dict] = None) -> Dict:
+    """Awaitable compile_contract that checks the cache here and runs solc in the pool"""
+    settings = settings or COMPILE_SETTINGS
+    cache_key = CompilationCache.make_key(contract_source, solc_version, settings)
+    cached = compilation_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    try:
+        async with admission.limit('compile'):
+            result = await compile_executor.run(
+                compile_contract, contract_source, None, solc_version, False, settings
+            )
+    except CompileQueueFull as e:
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+    except asyncio.TimeoutError:
+        return {
+            'status': 'error',
+            'message': f'Compilation timed out after {compile_executor.timeout} seconds'
+        }
+
+    if result['status'] == 'success':
+        compilation_cache.put(cache_key, result)
+    return result
+
+def batch_source_result(name: str, source: str, output: Dict) -> Dict:
+    """Shape one source unit of a standard-JSON output like a compile_contract result"""
+    contracts = {
+        contract_name: {
+            'abi': contract_interface['abi'],
+            'bytecode': contract_interface['evm']['bytecode']['object']
+        }
+        for contract_name, contract_interface in output.get('contracts', {}).get(name, {}).items()
+    }
+    diagnostics = parse_diagnostics(source, [
+        error for error in output.get('errors', [])
+        if error.get('sourceLocation', {}).get('file') == name
+    ])
+    if not contracts:
+        return {'status': 'error', 'message': 'Source defines no contracts', 'diagnostics': diagnostics}
+    
+    first = next(iter(contracts.values()))
+    return {
+        'status': 'success',
+        'abi': first['abi'],
+        'bytecode': first['bytecode'],
+        'contracts': contracts,
+        'ast': output.get('sources', {}).get(name, {}).get('ast'),
+        'diagnostics': diagnostics
+    }
+
+def compile_batch(sources: Dict[str, str], solc_version: str = '0.8.20', settings: Optional[Dict] = None) -> Dict[str, Dict]:
+    """Compile many sources in one standard-JSON invocation, entirely in memory.
+
+    Returns a result per source name with its ABI, bytecode, AST and diagnostics.
+    solc emits no output at all when any source unit has errors, so sources with
+    errors are reported and the error-free rest is compiled again without them.
+    """
+    settings = settings or COMPILE_SETTINGS
+    results: Dict[str, Dict] = {}
+    pending = list(sources)
+    while pending:
+        input_data = {
+            'language': 'Solidity',
+            'sources': {name: {'content': sources[name]} for name in pending},
+            'settings': settings
+        }
+        try:
+            output = compile_standard(input_data, solc_version=solc_version)
+        except SolcError as e:
+            try:
+                errors = json.loads(e.stdout_data).get('errors', [])
+            except (TypeError, ValueError):
+                errors = []
+            
+            failed = []
+            for name in pending:
+                own_errors = [
+                    error for error in errors
+                    if error.get('sourceLocation', {}).get('file') == name
+                ]
+                diagnostics = parse_diagnostics(sources[name], own_errors)
+                if any(d['severity'] == 'error' for d in diagnostics):
+                    failed.append(name)
+                    results[name] = {
+                        'status': 'error',
+                        'message': "\n".join(d['formatted_message'] for d in diagnostics if d['severity'] == 'error'),
+                        'diagnostics': diagnostics
+                    }
+            
+            # Errors without a source location cannot be pinned on a source
+            if not failed:
+                for name in pending:
+                    results[name] = {
+                        'status': 'error',
+                        'message': str(e),
+                        'diagnostics': parse_diagnostics(sources[name], errors)
+                    }
+                break
+            pending = [name for name in pending if name not in failed]
+            continue
+        except Exception as e:
+            for name in pending:
+                results[name] = {'status': 'error', 'message': str(e)}
+            break
+        
+        for name in pending:
+            results[name] = batch_source_result(name, sources[name], output)
+        break
+    
+    return {name: results[name] for name in sources}
+
+def batch_cache_key(name: str, source: str, solc_version: str, settings: Dict) -> Optional[str]:
+    """Cache key for one source of a batch, or None if its result depends on other sources"""
+    # An import may resolve to another source in the same batch
+    if re.search(r'^\s*import\b', source, re.MULTILINE):
+        return None
+    # The source name ends up in the AST, so it is part of the key
+    return CompilationCache.make_key(source, solc_version, {'batch_source': name, 'settings': settings})
+
+async def acompile_batch(sources: Dict[str, str], solc_version: str = '0.8.20',
+                         settings: Optional[Dict] = None) -> Dict[str, Dict]:
+    """Awaitable compile_batch that serves cached sources and runs solc on the rest in the pool"""
+    settings = settings or COMPILE_SETTINGS
+    keys = {name: batch_cache_key(name, source, solc_version, settings) for name, source in sources.items()}
+    results: Dict[str, Dict] = {}
+    for name, key in keys.items():
+        cached = compilation_cache.get(key) if key else None
+        if cached is not None:
+            results[name] = dict(cached)
+    
+    missing = {name: source for name, source in sources.items() if name not in results}
+    if missing:
+        try:
+            async with admission.limit('compile'):
+                compiled = await compile_executor.run(compile_batch, missing, solc_version, settings)
+        except CompileQueueFull as e:
+            compiled = {name: {'status': 'error', 'message': str(e)} for name in missing}
+        except asyncio.TimeoutError:
+            message = f'Compilation timed out after {compile_executor.timeout} seconds'
+            compiled = {name: {'status': 'error', 'message': message} for name in missing}
+        
+        for name, result in compiled.items():
+            if result['status'] == 'success' and keys[name]:
+                compilation_cache.put(keys[name], result)
+        results.update(compiled)
+    
+    return {name: results[name] for name in sources}
+
+async def acompile_fix_candidates(candidates: List[str], solc_version: str = '0.8.20') -> Dict:
+    """Compile fix candidates as one batch and pick the first that compiles.
+
+    The winner is cached like a normal compile so the pipeline does not recompile it.
+    """
+    names = [f'candidate_{index}.sol' for index in range(len(candidates))]
+    results = await acompile_batch(dict(zip(names, candidates)), solc_version)
+    diagnostics = [results[name].get('diagnostics', []) for name in names]
+    
+    for index, name in enumerate(names):
+        if results[name]['status'] == 'success':
+            compilation_cache.put(
+                CompilationCache.make_key(candidates[index], solc_version, COMPILE_SETTINGS),
+                results[name]
+            )
+            return {'index': index, 'result': results[name], 'diagnostics': diagnostics}
+    
+    return {
+        'index': None,
+        'message': results[names[0]].get('message') if names else 'No candidates',
+        'diagnostics': diagnostics
+    }
+
+class AdmissionRejected(Exception):
+    """Raised when a resource class's wait queue is full"""
+
+    def __init__(self, resource: str, retry_after: int):
+        super().__init__(f'Too many pending {resource} operations, retry in {retry_after}s')
+        self.resource = resource
+        self.retry_after = retry_after
+
+# Add per-resource admission control
+class ResourceLimiter:
+    """Concurrency limit with a bounded wait queue for one resource class"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_hold = 1.0  # seconds, exponential moving average
+
+    def saturated(self) -> bool:
+        return self.active >= self.max_concurrency and self.waiting >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Estimate how long until a queue slot frees up"""
+        return max(1, int(self.avg_hold * (self.waiting + 1) / self.max_concurrency + 0.5))
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.saturated():
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.retry_after())
+        
+        # Created lazily so it binds to the running loop
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.active += 1
+        
+        held_since = time.monotonic()
+        try:
+            yield
+        finally:
+            self.avg_hold = 0.9 * self.avg_hold + 0.1 * (time.monotonic() - held_since)
+            self.active -= 1
+            self.semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            'active': self.active,
+            'max_concurrency': self.max_concurrency,
+            'queue_depth': self.waiting,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'avg_wait_seconds': round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            'max_wait_seconds': round(self.max_wait, 4)
+        }
+
+class AdmissionController:
+    """Holds one ResourceLimiter per resource class (llm, compile, rpc)"""
+
+    def __init__(self, limits: Dict[str, tuple]):
+        self.limiters = {
+            name: ResourceLimiter(name, max_concurrency, max_queue)
+            for name, (max_concurrency, max_queue) in limits.items()
+        }
+
+    def limit(self, resource: str):
+        return self.limiters[resource].acquire()
+
+    def check(self, *resources: str):
+        """Fail fast before starting work that needs a saturated resource"""
+        for resource in resources:
+            limiter = self.limiters[resource]
+            if limiter.saturated():
+                limiter.rejected += 1
+                raise AdmissionRejected(resource, limiter.retry_after())
+
+    def stats(self) -> Dict:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+admission = AdmissionController({
+    'llm': (
+        int(os.getenv("ADMISSION_LLM_CONCURRENCY", "16")),
+        int(os.getenv("ADMISSION_LLM_QUEUE", "64"))
+    ),
+    'compile': (
+        int(os.getenv("ADMISSION_COMPILE_CONCURRENCY", str(compile_executor.max_workers))),
+        int(os.getenv("ADMISSION_COMPILE_QUEUE", str(compile_executor.max_queue)))
+    ),
+    'rpc': (
+        int(os.getenv("ADMISSION_RPC_CONCURRENCY", "32")),
+        int(os.getenv("ADMISSION_RPC_QUEUE", "128"))
+    )
+})
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={'detail': str(exc), 'resource': exc.resource},
+        headers={'Retry-After': str(exc.retry_after)}
+    )
+
+# Add process-wide agent pool
+class AgentPool:
+    """Holds the long-lived agents so they are built once instead of per request"""
+
+    def __init__(self):
+        self.manager: Optional[ContractManager] = None
+        self.verifier: Optional['ContractVerificationAgent'] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.manager is None:
+                self.manager = ContractManager()
+                self.verifier = ContractVerificationAgent(
+                    "Verifier",
+                    "Smart Contract Verification Specialist",
+                    llm=self.manager.llm
+                )
+
+    def contract_manager(self, use_cache: bool = True) -> ContractManager:
+        """Get a manager for one request; agent memory is never shared between requests"""
+        self.start()
+        return self.manager.for_request(use_cache)
+
+    def verification_agent(self, use_cache: bool = True) -> 'ContractVerificationAgent':
+        self.start()
+        return self.verifier.fork(use_cache)
+
+agent_pool = AgentPool()
+
 def process_contract_request(prompt: str) -> Dict:
     """Main function to handle user's contract request"""
-    manager = ContractManager()
+    manager = agent_pool.contract_manager()
     return manager.process_user_prompt(prompt)
 
 # Add these classes after the existing classes but before process_contract_request
 class ContractRequest(BaseModel):
     prompt: str
+    bypass_cache: bool = False
+    tune_optimizer: bool = False
 
 class ContractResponse(BaseModel):
     status: str
@@ -746,8 +2275,98 @@ def get_constructor_params(abi: List[Dict]) -> List[Dict]:
             } for param in item.get('inputs', [])]
     return []  # Return empty list if no constructor found
 
-async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
-    """Stream the contract generation process using SSE format"""
+# Add stage scheduler for commentary LLM calls
+class StageScheduler:
+    """Runs commentary stages concurrently with the critical path of a pipeline.
+
+    Each scheduled stage is an awaitable producing a message plus the status payload
+    it completes; the payload is emitted as an SSE event once the message arrives.
+    """
+
+    def __init__(self):
+        self.stages: List[asyncio.Task] = []
+        self.started: List[asyncio.Future] = []
+        self.logger = logging.getLogger(__name__)
+
+    def start(self, awaitable) -> asyncio.Future:
+        """Start an awaitable now so it overlaps with whatever runs next"""
+        future = asyncio.ensure_future(awaitable)
+        self.started.append(future)
+        return future
+
+    def schedule(self, awaitable, payload: Dict):
+        """Emit ``payload`` with the awaitable's result as its message when it finishes"""
+        async def run_stage() -> str:
+            try:
+                message = await awaitable
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                # Commentary is best effort and must never fail the pipeline
+                self.logger.warning(f"Commentary stage {payload.get('agent')} failed: {str(e)}")
+                message = f'Explanation unavailable: {str(e)}'
+            return "event: status\ndata: " + json.dumps({**payload, 'message': message}) + "\n\n"
+
+        self.stages.append(asyncio.ensure_future(run_stage()))
+
+    def ready(self) -> List[str]:
+        """Collect the events of every stage that has finished, in scheduling order"""
+        finished = [stage for stage in self.stages if stage.done()]
+        self.stages = [stage for stage in self.stages if not stage.done()]
+        return [stage.result() for stage in finished]
+
+    async def until(self, task: asyncio.Future) -> AsyncGenerator[str, None]:
+        """Yield commentary events as they finish until ``task`` (on the critical path) is done"""
+        while not task.done():
+            await asyncio.wait([task, *self.stages], return_when=asyncio.FIRST_COMPLETED)
+            for event in self.ready():
+                yield event
+
+    async def drain(self) -> AsyncGenerator[str, None]:
+        """Yield the remaining commentary events as they finish"""
+        while self.stages:
+            await asyncio.wait(self.stages, return_when=asyncio.FIRST_COMPLETED)
+            for event in self.ready():
+                yield event
+
+    def cancel(self):
+        """Cancel anything still running, e.g. when the pipeline stops early"""
+        for future in self.stages + self.started:
+            if not future.done():
+                future.cancel()
+        self.stages = []
+        self.started = []
+
+async def stream_contract_generation(prompt: str, bypass_cache: bool = False,
+                                     tune_optimizer: bool = False) -> AsyncGenerator[str, None]:
+    """Stream the contract generation process using SSE format.
+
+    Commentary stages still pending when the pipeline stops, including on an early
+    return, are drained so their status events are always sent; they are only
+    cancelled when the client goes away.
+    """
+    scheduler = StageScheduler()
+    pipeline = run_contract_pipeline(prompt, bypass_cache, tune_optimizer, scheduler)
+    try:
+        async for event in pipeline:
+            yield event
+        async for event in scheduler.drain():
+            yield event
+    except AdmissionRejected as e:
+        # Raised anywhere in the pipeline, its recovery path or a commentary stage
+        yield "event: error\ndata: " + json.dumps({
+            'agent': 'ContractManager',
+            'action': 'Admission control',
+            'status': 'failed',
+            'data': {'error': str(e), 'retry_after': e.retry_after}
+        }) + "\n\n"
+    finally:
+        await pipeline.aclose()
+        scheduler.cancel()
+
+async def run_contract_pipeline(prompt: str, bypass_cache: bool, tune_optimizer: bool,
+                                scheduler: StageScheduler) -> AsyncGenerator[str, None]:
+    """The generation pipeline; commentary stages run on ``scheduler``"""
     # Add early return for empty prompt
     if not prompt or prompt.isspace():
         yield "event: error\ndata: " + json.dumps({
@@ -758,7 +2377,7 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
         }) + "\n\n"
         return
 
-    manager = ContractManager()
+    manager = agent_pool.contract_manager(use_cache=not bypass_cache)
     
     try:
         # Parser stage
@@ -768,22 +2387,26 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
             'status': 'in_progress'
         }) + "\n\n"
         
-        requirements = manager.parser.parse(prompt)
+        requirements = await manager.parser.aparse(prompt, use_cache=manager.use_cache)
         
-        # Use the analyzer agent instead of direct llm calls for explanations
-        parser_explanation = manager.analyzer.process(
-            f"""Briefly explain (in 5-10 lines) what requirements were parsed and why:
-            Original prompt: {prompt}
-            Parsed requirements: {json.dumps(requirements, indent=2)}"""
+        # Explanations only depend on the requirements, so they run alongside code generation
+        scheduler.schedule(
+            manager.analyzer.aprocess(
+                f"""Briefly explain (in 5-10 lines) what requirements were parsed and why:
+                Original prompt: {prompt}
+                Parsed requirements: {json.dumps(requirements, indent=2)}"""
+            ),
+            {
+                'agent': 'RequirementsParser',
+                'action': 'Parsing requirements',
+                'status': 'completed',
+                'data': requirements
+            }
         )
-        
-        yield "event: status\ndata: " + json.dumps({
-            'agent': 'RequirementsParser',
-            'action': 'Parsing requirements',
-            'status': 'completed',
-            'data': requirements,
-            'message': parser_explanation
-        }) + "\n\n"
+        developer_explanation = scheduler.start(manager.analyzer.aprocess(
+            f"""In 5-10 lines, explain what contract features were implemented and why:
+            Requirements: {json.dumps(requirements, indent=2)}"""
+        ))
 
         # Developer stage with explanation
         yield "event: status\ndata: " + json.dumps({
@@ -792,30 +2415,40 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
             'status': 'in_progress'
         }) + "\n\n"
         
-        raw_contract_code = manager.developer.process(
+        # Stream tokens to the client as they arrive
+        chunks = []
+        async for token in manager.developer.astream(
             f"""Create a complete Solidity smart contract with these exact specifications:
             {json.dumps(requirements)}
             
             IMPORTANT: The contract must be completely self-contained.
             DO NOT use any external imports or inheritance.
             Define all necessary functions, modifiers, and variables within the contract itself."""
-        )
-        
-        contract_code = manager.extract_contract_code(raw_contract_code)
-        
-        # Use analyzer for developer explanation
-        developer_explanation = manager.analyzer.process(
-            f"""In 5-10 lines, explain what contract features were implemented and why:
-            Requirements: {json.dumps(requirements, indent=2)}"""
-        )
+        ):
+            chunks.append(token)
+            yield "event: delta\ndata: " + json.dumps({
+                'agent': 'Developer',
+                'action': 'Generating contract code',
+                'status': 'streaming',
+                'delta': token
+            }) + "\n\n"
+            for event in scheduler.ready():
+                yield event
         
-        yield "event: status\ndata: " + json.dumps({
+        contract_code = manager.extract_contract_code("".join(chunks))
+        yield "event: delta\ndata: " + json.dumps({
             'agent': 'Developer',
             'action': 'Generating contract code',
             'status': 'completed',
-            'data': {'contract_code': contract_code},
-            'message': developer_explanation
+            'data': {'contract_code': contract_code}
         }) + "\n\n"
+        
+        scheduler.schedule(developer_explanation, {
+            'agent': 'Developer',
+            'action': 'Generating contract code',
+            'status': 'completed',
+            'data': {'contract_code': contract_code}
+        })
 
         # Compilation stage with explanation
         yield "event: status\ndata: " + json.dumps({
@@ -826,16 +2459,40 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
         
         max_attempts = 3
         attempt = 0
+        max_local_fixes = 3
+        local_fix_attempt = 0
         compilation_result = None
+        # Fix prompts never read the response cache, or a fix that failed to compile would be replayed
+        fixer = manager.developer.fork(use_cache=False)
         
         while attempt < max_attempts:
-            compilation_result = manager.compile_with_remappings(contract_code)
+            compilation_result = await manager.acompile_with_remappings(contract_code)
             
             if (compilation_result['status'] == 'success' and 
                 compilation_result.get('abi') and 
                 compilation_result.get('bytecode')):
                 break
             
+            # Try deterministic fixes first; they recompile in milliseconds
+            if compilation_result['status'] == 'error' and local_fix_attempt < max_local_fixes:
+                local_fix = ErrorHandler.apply_local_fixes(contract_code, compilation_result)
+                if local_fix['applied']:
+                    local_fix_attempt += 1
+                    if local_fix['install_version']:
+                        try:
+                            await asyncio.to_thread(install_solc, local_fix['install_version'])
+                        except Exception as e:
+                            manager.logger.warning(f"Failed to install solc {local_fix['install_version']}: {str(e)}")
+                    contract_code = local_fix['contract_code']
+                    
+                    yield "event: status\ndata: " + json.dumps({
+                        'agent': 'Compiler',
+                        'action': 'Applying local fixes',
+                        'status': 'completed',
+                        'data': {'fixes': local_fix['applied'], 'attempt': local_fix_attempt}
+                    }) + "\n\n"
+                    continue
+            
             yield "event: status\ndata: " + json.dumps({
                 'agent': 'Compiler',
                 'action': 'Compilation attempt',
@@ -844,23 +2501,110 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
             }) + "\n\n"
             
             error_msg = compilation_result.get('message', 'Unknown compilation error')
-            fix_prompt = f"""
-            Fix the smart contract compilation issues. Specific error:
-            {error_msg}
             
-            IMPORTANT: When comparing addresses in Solidity:
-            1. Always use the address keyword for address literals
-            2. Use checksummed addresses
-            3. Format as: address(0x123...) or payable(0x123...)
+            # Only send the region around the errors when solc told us where they are
+            scope = manager.scope_compile_errors(contract_code, compilation_result.get('diagnostics', []))
+            if scope:
+                fix_prompt = f"""
+                Fix the smart contract compilation errors below. Only lines {scope['start_line']}-{scope['end_line']} of the contract are shown.
+                Errors:
+                {scope['errors']}
+                
+                IMPORTANT: When comparing addresses in Solidity:
+                1. Always use the address keyword for address literals
+                2. Use checksummed addresses
+                3. Format as: address(0x123...) or payable(0x123...)
+                
+                Lines {scope['start_line']}-{scope['end_line']}:
+                {scope['region']}
+                
+                Return ONLY the corrected code for lines {scope['start_line']}-{scope['end_line']}, without line numbers or explanation.
+                """
+            else:
+                fix_prompt = f"""
+                Fix the smart contract compilation issues. Specific error:
+                {error_msg}
+                
+                IMPORTANT: When comparing addresses in Solidity:
+                1. Always use the address keyword for address literals
+                2. Use checksummed addresses
+                3. Format as: address(0x123...) or payable(0x123...)
+                
+                Current contract code:
+                {contract_code}
+                
+                Return only the complete fixed contract code.
+                """
             
-            Current contract code:
-            {contract_code}
+            if manager.speculative_fixes > 1:
+                # Trade tokens for round-trips: sample several fixes at once and keep one that compiles
+                yield "event: status\ndata: " + json.dumps({
+                    'agent': 'Developer',
+                    'action': 'Fixing compilation errors',
+                    'status': 'in_progress',
+                    'data': {'candidates': manager.speculative_fixes}
+                }) + "\n\n"
+                
+                generation = scheduler.start(manager.generate_fix_candidates(
+                    fix_prompt, contract_code, scope, manager.speculative_fixes
+                ))
+                async for event in scheduler.until(generation):
+                    yield event
+                candidates = generation.result()
+                
+                selection = await acompile_fix_candidates(candidates)
+                if selection['index'] is not None:
+                    contract_code = candidates[selection['index']]
+                    compilation_result = selection['result']
+                else:
+                    # Nothing compiled; continue from the candidate with the fewest errors. A candidate
+                    # without error diagnostics was never compiled (timeout, full queue, solc crash),
+                    # so it is not a contender, and with none left the current code is kept.
+                    error_counts = [
+                        (sum(1 for d in candidate_diagnostics if d['severity'] == 'error'), index)
+                        for index, candidate_diagnostics in enumerate(selection['diagnostics'])
+                    ]
+                    compiled = [count for count in error_counts if count[0] > 0]
+                    if compiled:
+                        contract_code = candidates[min(compiled)[1]]
+                
+                yield "event: delta\ndata: " + json.dumps({
+                    'agent': 'Developer',
+                    'action': 'Fixing compilation errors',
+                    'status': 'completed',
+                    'data': {
+                        'contract_code': contract_code,
+                        'candidates': len(candidates),
+                        'selected_candidate': selection['index']
+                    }
+                }) + "\n\n"
+                attempt += 1
+                if selection['index'] is not None:
+                    break
+                continue
             
-            Return only the complete fixed contract code.
-            """
+            chunks = []
+            async for token in fixer.astream(fix_prompt):
+                chunks.append(token)
+                yield "event: delta\ndata: " + json.dumps({
+                    'agent': 'Developer',
+                    'action': 'Fixing compilation errors',
+                    'status': 'streaming',
+                    'delta': token
+                }) + "\n\n"
+                for event in scheduler.ready():
+                    yield event
             
-            raw_contract_code = manager.developer.process(fix_prompt)
-            contract_code = manager.extract_contract_code(raw_contract_code)
+            if scope:
+                contract_code = manager.apply_scoped_fix(contract_code, scope, "".join(chunks))
+            else:
+                contract_code = manager.extract_contract_code("".join(chunks))
+            yield "event: delta\ndata: " + json.dumps({
+                'agent': 'Developer',
+                'action': 'Fixing compilation errors',
+                'status': 'completed',
+                'data': {'contract_code': contract_code}
+            }) + "\n\n"
             attempt += 1
 
         if not compilation_result or compilation_result['status'] != 'success':
@@ -881,7 +2625,7 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
             'agent': 'Compiler',
             'action': 'Compiling contract',
             'status': compilation_result['status'],
-            'data': compilation_result,
+            'data': {key: value for key, value in compilation_result.items() if key != 'ast'},
             'message': compiler_explanation
         }) + "\n\n"
 
@@ -898,18 +2642,30 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
         has_critical_issues = True
         
         while has_critical_issues and security_fix_attempt < max_security_fixes:
-            security_analysis = manager.analyzer.process(
-                f"""Analyze this smart contract for security issues and explain your findings.
-                Focus on identifying CRITICAL vulnerabilities first.
-                Format your response as JSON with these fields:
-                - critical_issues: array of critical vulnerabilities (empty if none found)
-                - other_issues: array of medium/low severity issues
-                - recommendations: specific fixes for each issue
-                - explanation: detailed analysis
-                
-                Contract code:
-                {contract_code}"""
-            )
+            # Local pre-screen first; the LLM is skipped only when it already found critical issues
+            static_result = manager.static_analyzer.analyze(compilation_result.get('ast'), contract_code)
+            
+            if static_result.pop('conclusive'):
+                security_analysis = json.dumps(static_result)
+            else:
+                analysis = scheduler.start(manager.analyzer.aprocess(
+                    f"""Analyze this smart contract for security issues and explain your findings.
+                    Focus on identifying CRITICAL vulnerabilities first.
+                    Format your response as JSON with these fields:
+                    - critical_issues: array of critical vulnerabilities (empty if none found)
+                    - other_issues: array of medium/low severity issues
+                    - recommendations: specific fixes for each issue
+                    - explanation: detailed analysis
+                    
+                    A static analysis pre-screen already reported these findings; confirm or refute them:
+                    {json.dumps(static_result, indent=2)}
+                    
+                    Contract code:
+                    {contract_code}"""
+                ))
+                async for event in scheduler.until(analysis):
+                    yield event
+                security_analysis = analysis.result()
             
             try:
                 # Handle both direct JSON and JSON within code blocks
@@ -928,13 +2684,13 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
                     if security_fix_attempt == 1:
                         security_explanation = "After applying fixes, no critical security issues remain. The contract has been reviewed and improved for security."
                     else:
-                        security_explanation = manager.analyzer.process(
+                        security_explanation = scheduler.start(manager.analyzer.aprocess(
                             f"""In 5-10 lines, summarize your security analysis findings and recommendations:
                             Analysis results: {security_analysis}"""
-                        )
+                        ))
                     
                     # Recompile the final code
-                    compilation_result = manager.compile_with_remappings(contract_code)
+                    compilation_result = await manager.acompile_with_remappings(contract_code)
                     if compilation_result['status'] != 'success':
                         yield "event: error\ndata: " + json.dumps({
                             'agent': 'Compiler',
@@ -944,13 +2700,19 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
                         }) + "\n\n"
                         return
                     
-                    yield "event: status\ndata: " + json.dumps({
+                    security_completed = {
                         'agent': 'SecurityAnalyzer',
                         'action': 'Analyzing contract security',
                         'status': 'completed',
-                        'data': {'analysis': security_analysis},
-                        'message': security_explanation
-                    }) + "\n\n"
+                        'data': {'analysis': security_analysis}
+                    }
+                    if isinstance(security_explanation, str):
+                        yield "event: status\ndata: " + json.dumps({
+                            **security_completed,
+                            'message': security_explanation
+                        }) + "\n\n"
+                    else:
+                        scheduler.schedule(security_explanation, security_completed)
                     break
                 
                 # If critical issues found in first attempt, send to developer for fixes
@@ -986,11 +2748,28 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
                     'data': {'attempt': security_fix_attempt + 1, 'max_attempts': max_security_fixes}
                 }) + "\n\n"
                 
-                raw_fixed_code = manager.developer.process(fix_prompt)
-                contract_code = manager.extract_contract_code(raw_fixed_code)
+                chunks = []
+                async for token in fixer.astream(fix_prompt):
+                    chunks.append(token)
+                    yield "event: delta\ndata: " + json.dumps({
+                        'agent': 'Developer',
+                        'action': 'Fixing critical security issues',
+                        'status': 'streaming',
+                        'delta': token
+                    }) + "\n\n"
+                    for event in scheduler.ready():
+                        yield event
+                
+                contract_code = manager.extract_contract_code("".join(chunks))
+                yield "event: delta\ndata: " + json.dumps({
+                    'agent': 'Developer',
+                    'action': 'Fixing critical security issues',
+                    'status': 'completed',
+                    'data': {'contract_code': contract_code}
+                }) + "\n\n"
                 
                 # Compile the fixed code
-                compilation_result = manager.compile_with_remappings(contract_code)
+                compilation_result = await manager.acompile_with_remappings(contract_code)
                 if compilation_result['status'] != 'success':
                     yield "event: error\ndata: " + json.dumps({
                         'agent': 'Compiler',
@@ -1034,6 +2813,38 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
             }) + "\n\n"
             return
 
+        # Optionally sweep solc optimizer settings and ship the cheapest build
+        gas_profile = None
+        compile_settings = None
+        if tune_optimizer:
+            yield "event: status\ndata: " + json.dumps({
+                'agent': 'Compiler',
+                'action': 'Tuning optimizer settings',
+                'status': 'in_progress'
+            }) + "\n\n"
+            
+            tuned = await atune_compile_settings(contract_code)
+            if tuned['status'] == 'success':
+                gas_profile = tuned.pop('gas_profile')
+                compilation_result = tuned
+                selected = tuned['optimizer_settings']
+                compile_settings = optimizer_settings(selected['runs'], selected['viaIR'], selected['enabled'])
+                yield "event: status\ndata: " + json.dumps({
+                    'agent': 'Compiler',
+                    'action': 'Tuning optimizer settings',
+                    'status': 'success',
+                    'data': {key: value for key, value in tuned.items() if key != 'ast'},
+                    'message': f"Selected optimizer settings {json.dumps(tuned['optimizer_settings'])}"
+                }) + "\n\n"
+            else:
+                # Tuning is optional; keep the untuned build
+                yield "event: status\ndata: " + json.dumps({
+                    'agent': 'Compiler',
+                    'action': 'Tuning optimizer settings',
+                    'status': 'skipped',
+                    'message': f"Keeping default settings: {tuned.get('message')}"
+                }) + "\n\n"
+
         # Argument analysis stage with explanation
         if compilation_result['status'] == 'success':
             yield "event: status\ndata: " + json.dumps({
@@ -1056,53 +2867,69 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
                         }
             
             # Add argument analyzer explanation
-            argument_explanation = manager.analyzer.process(
-                f"""In 5-10 lines, explain the key functions in this contract and their important parameters:
-                Functions: {json.dumps(function_inputs, indent=2)}"""
+            scheduler.schedule(
+                manager.analyzer.aprocess(
+                    f"""In 5-10 lines, explain the key functions in this contract and their important parameters:
+                    Functions: {json.dumps(function_inputs, indent=2)}"""
+                ),
+                {
+                    'agent': 'ArgumentAnalyzer',
+                    'action': 'Function arguments analysis',
+                    'status': 'completed',
+                    'data': {'available_functions': function_inputs}
+                }
             )
 
-            yield "event: status\ndata: " + json.dumps({
-                'agent': 'ArgumentAnalyzer',
-                'action': 'Function arguments analysis',
-                'status': 'completed',
-                'data': {'available_functions': function_inputs},
-                'message': argument_explanation
-            }) + "\n\n"
-
-        # Final result with process summary
-        final_summary = manager.coordinator.process(
-            f"""In 5-10 lines, summarize what was accomplished in generating this contract:
-            Requirements: {json.dumps(requirements, indent=2)}
-            Security Analysis: {security_analysis}
-            Security Fixes Applied: {security_fix_attempt} fixes needed
-            Final Compilation: {'successful' if compilation_result['status'] == 'success' else 'failed'}"""
-        )
-
         # Get constructor parameters
         constructor_params = get_constructor_params(compilation_result['abi'])
 
-        # Final yield with complete contract information
+        # Final result with process summary, emitted with complete contract information
+        scheduler.schedule(
+            manager.coordinator.aprocess(
+                f"""In 5-10 lines, summarize what was accomplished in generating this contract:
+                Requirements: {json.dumps(requirements, indent=2)}
+                Security Analysis: {security_analysis}
+                Security Fixes Applied: {security_fix_attempt} fixes needed
+                Final Compilation: {'successful' if compilation_result['status'] == 'success' else 'failed'}"""
+            ),
+            {
+                'agent': 'ContractManager',
+                'action': 'Process completed',
+                'status': 'completed',
+                'data': {
+                    'contract_code': contract_code,
+                    'security_analysis': security_analysis,
+                    'security_fixes_applied': security_fix_attempt,
+                    'abi': compilation_result['abi'],
+                    'bytecode': compilation_result['bytecode'],
+                    'function_arguments': function_inputs,
+                    'constructor_params': constructor_params
+                }
+            }
+        )
+
+        # Measure real gas usage to drive the optimizer
+        if gas_profile is None or gas_profile['status'] != 'success':
+            gas_profile = await aprofile_gas(compilation_result['abi'], compilation_result['bytecode'])
         yield "event: status\ndata: " + json.dumps({
-            'agent': 'ContractManager',
-            'action': 'Process completed',
-            'status': 'completed',
-            'data': {
-                'contract_code': contract_code,
-                'security_analysis': security_analysis,
-                'security_fixes_applied': security_fix_attempt,
-                'abi': compilation_result['abi'],
-                'bytecode': compilation_result['bytecode'],
-                'function_arguments': function_inputs,
-                'constructor_params': constructor_params
-            },
-            'message': final_summary
+            'agent': 'GasProfiler',
+            'action': 'Gas profiling',
+            'status': 'completed' if gas_profile['status'] == 'success' else 'skipped',
+            'data': gas_profile
         }) + "\n\n"
 
-        # Add autonomous optimization
-        optimization_result = await manager.optimizer.optimize_contract(
+        # Add autonomous optimization, overlapping with the remaining commentary
+        optimization = scheduler.start(manager.optimizer.optimize_contract(
             contract_code=contract_code,
-            gas_analysis={'current_cost': 'high'}  # Add actual gas analysis
-        )
+            gas_analysis=gas_profile,
+            use_cache=manager.use_cache,
+            settings=compile_settings
+        ))
+        async for event in scheduler.until(optimization):
+            yield event
+        async for event in scheduler.drain():
+            yield event
+        optimization_result = optimization.result()
         
         if optimization_result['status'] == 'success':
             contract_code = optimization_result['optimized_code']
@@ -1113,6 +2940,9 @@ async def stream_contract_generation(prompt: str) -> AsyncGenerator[str, None]:
                 'data': optimization_result
             }) + "\n\n"
             
+    except AdmissionRejected:
+        # Overload is not something the recovery agent can fix
+        raise
     except Exception as e:
         # Attempt autonomous recovery
         recovery_result = await manager.handle_error(str(e), {
@@ -1149,14 +2979,205 @@ def generate_example_args(inputs: List[Dict]) -> Dict[str, str]:
             
     return example_values
 
+def coerce_example_value(param_type: str, value: str) -> Any:
+    """Turn a ``generate_example_args`` string into a value web3 can ABI-encode"""
+    if param_type.endswith(']'):
+        base_type, length = param_type[:-1].rsplit('[', 1)
+        return [coerce_example_value(base_type, value)] * (int(length) if length else 1)
+    if param_type.startswith('tuple'):
+        raise ValueError('Tuple arguments have no example value')
+    if param_type == 'address':
+        return Web3.to_checksum_address(value)
+    if param_type.startswith(('uint', 'int')):
+        signed = param_type.startswith('int')
+        bits = int(param_type[3 if signed else 4:] or 256)
+        # Signed types get a "<int256>" placeholder; small types cannot hold 1e18
+        try:
+            number = int(value)
+        except ValueError:
+            number = 1
+        return min(number, 2 ** (bits - 1) - 1 if signed else 2 ** bits - 1)
+    if param_type == 'bool':
+        return value == 'true'
+    if param_type == 'string':
+        return value
+    if param_type == 'bytes':
+        return b''
+    if param_type.startswith('bytes'):
+        return b'\x00' * int(param_type[5:])
+    raise ValueError(f'No example value for {param_type}')
+
+def example_arguments(inputs: List[Dict]) -> List[Any]:
+    # Example values are generated per parameter so unnamed parameters do not collide
+    return [
+        coerce_example_value(param['type'], generate_example_args([param])[param['name']])
+        for param in inputs
+    ]
+
+def profile_gas(abi: List[Dict], bytecode: str) -> Dict:
+    """Deploy to an in-process EVM and measure gas for the constructor and every function.
+
+    Functions run in ABI order with example arguments; state changes carry over, so a
+    function that depends on earlier setup may revert and is reported with its error.
+    Each function's return value is recorded so two builds can be compared for behavior.
+    """
+    if EthereumTester is None:
+        return {
+            'status': 'unavailable',
+            'message': 'Gas profiling requires eth-tester with the py-evm backend'
+        }
+    
+    try:
+        w3 = Web3(Web3.EthereumTesterProvider(EthereumTester(PyEVMBackend())))
+        deployer = w3.eth.accounts[0]
+        constructor_inputs = next(
+            (item.get('inputs', []) for item in abi if item.get('type') == 'constructor'), []
+        )
+        tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(
+            *example_arguments(constructor_inputs)
+        ).transact({'from': deployer})
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        if not receipt['status']:
+            raise ValueError('Deployment reverted')
+        contract = w3.eth.contract(address=receipt['contractAddress'], abi=abi)
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Deployment failed: {str(e)}'
+        }
+    
+    functions = {}
+    for item in abi:
+        if item.get('type') != 'function':
+            continue
+        
+        signature = f"{item['name']}({','.join(collapse_if_tuple(param) for param in item.get('inputs', []))})"
+        mutability = item.get('stateMutability', 'nonpayable')
+        try:
+            call = contract.get_function_by_signature(signature)(*example_arguments(item.get('inputs', [])))
+            result = json.loads(Web3.to_json(call.call({'from': deployer})))
+            if mutability in ['view', 'pure']:
+                gas = call.estimate_gas({'from': deployer})
+            else:
+                function_receipt = w3.eth.wait_for_transaction_receipt(call.transact({'from': deployer}))
+                gas = function_receipt['gasUsed']
+            functions[signature] = {'mutability': mutability, 'gas': gas, 'result': result}
+        except Exception as e:
+            functions[signature] = {'mutability': mutability, 'error': str(e)}
+    
+    measured = [entry['gas'] for entry in functions.values() if 'gas' in entry]
+    return {
+        'status': 'success',
+        'deployment_gas': receipt['gasUsed'],
+        'runtime_size': len(w3.eth.get_code(contract.address)),
+        'functions': functions,
+        'total_function_gas': sum(measured)
+    }
+
+async def aprofile_gas(abi: List[Dict], bytecode: str) -> Dict:
+    """Run profile_gas in the compile pool; the EVM is CPU-bound like solc"""
+    try:
+        async with admission.limit('compile'):
+            return await compile_executor.run(profile_gas, abi, bytecode)
+    except CompileQueueFull as e:
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+    except asyncio.TimeoutError:
+        return {
+            'status': 'error',
+            'message': f'Gas profiling timed out after {compile_executor.timeout} seconds'
+        }
+
+def compile_and_profile(contract_source: str, solc_version: str, settings: Dict) -> Dict:
+    """Compile one sweep candidate and profile it in the same pool job"""
+    result = compile_contract(contract_source, None, solc_version, True, settings)
+    if result['status'] == 'success':
+        result['gas_profile'] = profile_gas(result['abi'], result['bytecode'])
+    return result
+
+async def atune_compile_settings(contract_source: str, solc_version: str = '0.8.20',
+                                 runs_values: Optional[List[int]] = None, expected_calls: int = 100) -> Dict:
+    """Compile across optimizer runs values with viaIR on and off, and keep the cheapest build.
+
+    Each candidate is compiled and profiled in a single pool job, with at most
+    ``TUNING_CONCURRENCY`` candidates admitted at once so one sweep cannot fill the
+    compile queue. Each is scored as deployment gas plus ``expected_calls`` times the
+    profiled function gas; if any candidate cannot be profiled, all are scored by a
+    code-deposit estimate from runtime bytecode size instead so the scores stay comparable.
+    Rejected or failed candidates are reported in ``tuning`` and skipped.
+    """
+    candidates = [{'enabled': False, 'runs': 200, 'viaIR': False}] + [
+        {'enabled': True, 'runs': runs, 'viaIR': via_ir}
+        for runs in (runs_values or OPTIMIZER_RUNS_SWEEP)
+        for via_ir in (False, True)
+    ]
+    sweep_slots = asyncio.Semaphore(TUNING_CONCURRENCY)
+
+    async def run_candidate(candidate: Dict) -> Dict:
+        settings = optimizer_settings(candidate['runs'], candidate['viaIR'], candidate['enabled'])
+        async with sweep_slots:
+            try:
+                async with admission.limit('compile'):
+                    return await compile_executor.run(compile_and_profile, contract_source, solc_version, settings)
+            except (AdmissionRejected, CompileQueueFull) as e:
+                return {'status': 'error', 'message': str(e)}
+            except asyncio.TimeoutError:
+                return {
+                    'status': 'error',
+                    'message': f'Compilation timed out after {compile_executor.timeout} seconds'
+                }
+
+    compiled = await asyncio.gather(*(run_candidate(candidate) for candidate in candidates))
+    
+    successful = [(candidate, result) for candidate, result in zip(candidates, compiled) if result['status'] == 'success']
+    if not successful:
+        return compiled[0]
+    
+    measured = all(result['gas_profile']['status'] == 'success' for _, result in successful)
+    
+    tuning = []
+    for candidate, result in successful:
+        profile = result.pop('gas_profile')
+        runtime_size = len(result.pop('deployed_bytecode', '')) // 2
+        entry = {**candidate, 'runtime_size': runtime_size}
+        if measured:
+            entry['deployment_gas'] = profile['deployment_gas']
+            entry['function_gas'] = profile['total_function_gas']
+            entry['score'] = profile['deployment_gas'] + expected_calls * profile['total_function_gas']
+        else:
+            # 200 gas per byte of runtime code is the code deposit cost
+            entry['score'] = 32000 + 200 * runtime_size
+        tuning.append((entry, result, profile))
+    for candidate, result in zip(candidates, compiled):
+        if result['status'] != 'success':
+            tuning.append(({**candidate, 'error': result.get('message')}, None, None))
+    
+    best_entry, best_result, best_profile = min(
+        (item for item in tuning if item[1] is not None),
+        key=lambda item: (item[0]['score'], item[0]['runtime_size'])
+    )
+    return {
+        **best_result,
+        'optimizer_settings': {key: best_entry[key] for key in ('enabled', 'runs', 'viaIR')},
+        'gas_profile': best_profile,
+        'tuning': {
+            'scoring': 'measured' if measured else 'estimated',
+            'expected_calls': expected_calls,
+            'candidates': [item[0] for item in tuning]
+        }
+    }
+
 # Update the endpoint
 @app.post("/generate-contract")
 async def generate_contract(request: ContractRequest):
     """
     Stream the contract generation process using Server-Sent Events
     """
+    admission.check('llm', 'compile')
     return StreamingResponse(
-        stream_contract_generation(request.prompt),
+        stream_contract_generation(request.prompt, request.bypass_cache, request.tune_optimizer),
         media_type="text/event-stream",
         headers={
             'Cache-Control': 'no-cache',
@@ -1165,16 +3186,474 @@ async def generate_contract(request: ContractRequest):
         }
     )
 
+# Limits on one /compile-batch request, which holds a compile slot for all its sources
+COMPILE_BATCH_MAX_SOURCES = int(os.getenv("COMPILE_BATCH_MAX_SOURCES", "32"))
+COMPILE_BATCH_MAX_BYTES = int(os.getenv("COMPILE_BATCH_MAX_BYTES", "1048576"))
+
+class BatchCompileRequest(BaseModel):
+    sources: Dict[str, str]
+    solc_version: str = '0.8.20'
+
+@app.post("/compile-batch")
+async def compile_sources(request: BatchCompileRequest):
+    """
+    Compile many Solidity sources in a single solc invocation
+    """
+    if not request.sources:
+        raise HTTPException(status_code=400, detail='No sources provided.')
+    if len(request.sources) > COMPILE_BATCH_MAX_SOURCES:
+        raise HTTPException(
+            status_code=413,
+            detail=f'Too many sources: {len(request.sources)} (limit {COMPILE_BATCH_MAX_SOURCES}).'
+        )
+    total_bytes = sum(len(name.encode()) + len(source.encode()) for name, source in request.sources.items())
+    if total_bytes > COMPILE_BATCH_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f'Sources total {total_bytes} bytes (limit {COMPILE_BATCH_MAX_BYTES}).'
+        )
+    
+    # Only compilers that are already installed; a request never triggers a download
+    installed = [str(version) for version in await asyncio.to_thread(get_installed_solc_versions)]
+    if request.solc_version not in installed:
+        raise HTTPException(
+            status_code=400,
+            detail=f'Unsupported solc version: {request.solc_version}. Installed versions: {", ".join(installed) or "none"}.'
+        )
+    
+    admission.check('compile')
+    return {'results': await acompile_batch(request.sources, request.solc_version)}
+
+def parse_sse(chunk: str) -> tuple:
+    """Split a formatted SSE chunk into its event type and data"""
+    event_type = 'message'
+    data_lines = []
+    for line in chunk.strip('\n').split('\n'):
+        if line.startswith('event: '):
+            event_type = line[len('event: '):]
+        elif line.startswith('data: '):
+            data_lines.append(line[len('data: '):])
+    return event_type, '\n'.join(data_lines)
+
+# Add persistent job store for contract generation
+class JobStore:
+    """SQLite-backed record of generation jobs and their SSE event logs"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        """Create the database on first use; called from the app lifespan, not at import"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, prompt TEXT NOT NULL, bypass_cache INTEGER NOT NULL, "
+                "status TEXT NOT NULL, created REAL NOT NULL, updated REAL NOT NULL, "
+                "tune_optimizer INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Databases created before tune_optimizer existed are migrated in place
+            columns = [row[1] for row in self.db.execute("PRAGMA table_info(jobs)")]
+            if 'tune_optimizer' not in columns:
+                self.db.execute("ALTER TABLE jobs ADD COLUMN tune_optimizer INTEGER NOT NULL DEFAULT 0")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, seq))"
+            )
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def create_job(self, prompt: str, bypass_cache: bool, tune_optimizer: bool = False) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO jobs (id, prompt, bypass_cache, status, created, updated, tune_optimizer) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, prompt, int(bypass_cache), now, now, int(tune_optimizer))
+            )
+            self.db.commit()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT id, prompt, bypass_cache, status, created, updated, "
+                "(SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = jobs.id), tune_optimizer "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row[0],
+            'prompt': row[1],
+            'bypass_cache': bool(row[2]),
+            'status': row[3],
+            'created': row[4],
+            'updated': row[5],
+            'last_event_id': row[6],
+            'tune_optimizer': bool(row[7])
+        }
+
+    def set_status(self, job_id: str, status: str):
+        with self.lock:
+            self.db.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+            self.db.commit()
+
+    def append_event(self, job_id: str, event_type: str, data: str) -> int:
+        with self.lock:
+            seq = self.db.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self.db.execute(
+                "INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                (job_id, seq, event_type, data)
+            )
+            self.db.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+            self.db.commit()
+        return seq
+
+    def append_events(self, job_id: str, events: List[tuple]):
+        """Append already-numbered (seq, event, data) rows in a single transaction"""
+        with self.lock:
+            self.db.executemany(
+                "INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                [(job_id, seq, event_type, data) for seq, event_type, data in events]
+            )
+            self.db.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+            self.db.commit()
+
+    def events_after(self, job_id: str, last_event_id: int) -> List[tuple]:
+        with self.lock:
+            return self.db.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, last_event_id)
+            ).fetchall()
+
+    def jobs_with_status(self, status: str) -> List[str]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created", (status,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+# Add background job runner for contract generation
+class JobManager:
+    """Runs generation jobs on a bounded pool of workers and serves their event logs.
+
+    Every SSE event a job produces is appended to the store, so clients can
+    disconnect and resume from ``Last-Event-ID`` at any point. Events are numbered
+    in memory and written off the event loop in batches of at most
+    ``flush_interval`` seconds; consecutive token deltas are merged before writing.
+    """
+
+    TERMINAL_STATUSES = ('completed', 'failed', 'interrupted')
+
+    def __init__(self, store: JobStore, max_workers: int, max_queue: int, flush_interval: float = 0.25):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.updated: Optional[asyncio.Condition] = None
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.updated = asyncio.Condition()
+        
+        # Jobs cut off by a restart keep their log but cannot be resumed mid-pipeline
+        for job_id in self.store.jobs_with_status('running'):
+            self.store.append_event(job_id, 'error', json.dumps({
+                'agent': 'JobManager',
+                'action': 'Running job',
+                'status': 'failed',
+                'data': {'error': 'Job was interrupted by a server restart'}
+            }))
+            self.store.set_status(job_id, 'interrupted')
+        
+        for job_id in self.store.jobs_with_status('queued'):
+            if self.queue.full():
+                # Left queued, the job would never run and its clients would wait forever
+                self.store.append_event(job_id, 'error', json.dumps({
+                    'agent': 'JobManager',
+                    'action': 'Queueing job',
+                    'status': 'failed',
+                    'data': {'error': 'Job could not be re-queued after a server restart; submit it again'}
+                }))
+                self.store.set_status(job_id, 'interrupted')
+                continue
+            self.queue.put_nowait(job_id)
+        
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.max_workers)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(self, prompt: str, bypass_cache: bool, tune_optimizer: bool = False) -> str:
+        if self.queue is None or self.queue.full():
+            raise HTTPException(
+                status_code=429,
+                detail='Job queue is full, try again later',
+                headers={'Retry-After': '30'}
+            )
+        
+        job_id = self.store.create_job(prompt, bypass_cache, tune_optimizer)
+        self.queue.put_nowait(job_id)
+        return job_id
+
+    async def worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                self.logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                await asyncio.to_thread(self.store.set_status, job_id, 'failed')
+                await self.notify()
+            finally:
+                self.queue.task_done()
+
+    async def run_job(self, job_id: str):
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        if job is None or job['status'] != 'queued':
+            return
+        
+        await asyncio.to_thread(self.store.set_status, job_id, 'running')
+        status = 'completed'
+        seq = job['last_event_id']
+        batch: List[tuple] = []
+        last_flush = time.monotonic()
+        try:
+            async for chunk in stream_contract_generation(job['prompt'], job['bypass_cache'], job['tune_optimizer']):
+                event_type, data = parse_sse(chunk)
+                status = self.final_status(status, event_type, data)
+                
+                merged = self.merge_delta(batch[-1], event_type, data) if batch else None
+                if merged is not None:
+                    batch[-1] = merged
+                else:
+                    seq += 1
+                    batch.append((seq, event_type, data))
+                
+                # Stage boundaries are written right away; token deltas wait for the interval
+                if event_type != 'delta' or time.monotonic() - last_flush >= self.flush_interval:
+                    await self.flush(job_id, batch)
+                    batch = []
+                    last_flush = time.monotonic()
+        finally:
+            await self.flush(job_id, batch)
+        
+        await asyncio.to_thread(self.store.set_status, job_id, status)
+        await self.notify()
+
+    @staticmethod
+    def final_status(status: str, event_type: str, data: str) -> str:
+        """Fold one event into the job's final status.
+
+        Errors are terminal, and so is the pipeline's error-recovery event: it only
+        appears when generation was aborted, so the job failed unless recovery succeeded.
+        """
+        if event_type == 'error':
+            return 'failed'
+        if event_type == 'status':
+            payload = json.loads(data)
+            if payload.get('agent') == 'ErrorRecovery':
+                return 'completed' if payload.get('status') == 'success' else 'failed'
+        return status
+
+    @staticmethod
+    def merge_delta(previous: tuple, event_type: str, data: str) -> Optional[tuple]:
+        """Fold a streaming token delta into the previous unwritten one from the same stage"""
+        if event_type != 'delta' or previous[1] != 'delta':
+            return None
+        
+        earlier, current = json.loads(previous[2]), json.loads(data)
+        if (earlier.get('status') != 'streaming' or current.get('status') != 'streaming' or
+                (earlier.get('agent'), earlier.get('action')) != (current.get('agent'), current.get('action'))):
+            return None
+        
+        earlier['delta'] += current['delta']
+        return (previous[0], 'delta', json.dumps(earlier))
+
+    async def flush(self, job_id: str, batch: List[tuple]):
+        if not batch:
+            return
+        await asyncio.to_thread(self.store.append_events, job_id, batch)
+        await self.notify()
+
+    async def notify(self):
+        async with self.updated:
+            self.updated.notify_all()
+
+    async def stream_events(self, job_id: str, last_event_id: int = 0) -> AsyncGenerator[str, None]:
+        """Replay a job's events after ``last_event_id``, then follow it until it finishes"""
+        while True:
+            # Read status before events so nothing appended in between is missed
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            events = await asyncio.to_thread(self.store.events_after, job_id, last_event_id)
+            for seq, event_type, data in events:
+                last_event_id = seq
+                yield f"id: {seq}\nevent: {event_type}\ndata: {data}\n\n"
+            
+            if job is None or job['status'] in self.TERMINAL_STATUSES:
+                return
+            
+            # Poll as a fallback for events written by another worker process
+            async with self.updated:
+                try:
+                    await asyncio.wait_for(self.updated.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+
+job_manager = JobManager(
+    JobStore(os.getenv("JOB_DB_PATH", ".cache/jobs.sqlite3")),
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_queue=int(os.getenv("JOB_QUEUE_LIMIT", "100"))
+)
+
+@app.post("/jobs")
+async def submit_job(request: ContractRequest):
+    """
+    Queue a contract generation job and return its ID
+    """
+    if not request.prompt or request.prompt.isspace():
+        raise HTTPException(status_code=400, detail='Empty prompt provided. Please specify contract requirements.')
+    
+    job_id = job_manager.submit(request.prompt, request.bypass_cache, request.tune_optimizer)
+    return {
+        'job_id': job_id,
+        'status': 'queued',
+        'events_url': f'/jobs/{job_id}/events'
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of a contract generation job"""
+    job = job_manager.store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream a job's events using Server-Sent Events, resuming after Last-Event-ID
+    """
+    if job_manager.store.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    
+    try:
+        resume_from = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Invalid Last-Event-ID header')
+    
+    return StreamingResponse(
+        job_manager.stream_events(job_id, resume_from),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+class MonitorRequest(BaseModel):
+    address: str
+    chain_id: int
+    abi: list
+    monitoring_config: Dict = {}
+
+def checksum_or_400(address: str) -> str:
+    try:
+        return Web3.to_checksum_address(address)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f'Invalid contract address: {address}')
+
+def supported_chain_or_400(chain_id: int) -> Dict:
+    chain_config = chain_config_for(chain_id)
+    if chain_config is None:
+        raise HTTPException(status_code=400, detail=f'Unsupported chain ID: {chain_id}')
+    return chain_config
+
+@app.post("/monitor")
+async def register_monitored_contract(request: MonitorRequest):
+    """Add a deployed contract on a supported chain to the periodic health checks, or update its config"""
+    supported_chain_or_400(request.chain_id)
+    address = checksum_or_400(request.address)
+    added = await asyncio.to_thread(
+        monitor_store.add_contract, request.chain_id, address, request.abi, request.monitoring_config
+    )
+    if not added:
+        raise HTTPException(
+            status_code=409,
+            detail=f'Already monitoring the maximum of {monitor_store.max_contracts} contracts'
+        )
+    return {
+        'address': address,
+        'chain_id': request.chain_id,
+        'results_url': f'/monitor/{address}?chain_id={request.chain_id}'
+    }
+
+@app.delete("/monitor/{address}")
+async def unregister_monitored_contract(address: str, chain_id: int):
+    """Stop monitoring a contract on one chain"""
+    address = checksum_or_400(address)
+    if not await asyncio.to_thread(monitor_store.remove_contract, chain_id, address):
+        raise HTTPException(status_code=404, detail='Contract is not monitored')
+    await asyncio.to_thread(transfer_index.forget, chain_id, address)
+    return {'status': 'removed'}
+
+@app.get("/monitor/{address}")
+async def get_monitoring_results(address: str, chain_id: int, limit: int = 20):
+    """Get the most recent health checks for a monitored contract, newest first"""
+    address = checksum_or_400(address)
+    return {
+        'address': address,
+        'chain_id': chain_id,
+        'results': await asyncio.to_thread(monitor_store.results, chain_id, address, limit)
+    }
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "compile_cache": compilation_cache.stats(),
+        "compile_executor": compile_executor.stats(),
+        "llm_cache": response_cache.stats(),
+        "admission": admission.stats(),
+        "rpc": provider_registry.stats(),
+        "rpc_cache": rpc_cache.stats(),
+        "monitoring": agent_pool.manager.monitoring_stats if agent_pool.manager else None,
+        "jobs": {
+            'workers': job_manager.max_workers,
+            'queued': job_manager.queue.qsize() if job_manager.queue else 0,
+            'max_queue': job_manager.max_queue
+        }
+    }
 
 # Add this new request model
 class ContractVerifyRequest(BaseModel):
     contract_address: str
     abi: list
     chain_id: int
+    bypass_cache: bool = False
 
 # Add new agent role for contract verification
 class ContractVerificationAgent(ContractAgent):
@@ -1197,6 +3676,10 @@ class ContractVerificationAgent(ContractAgent):
             input_variables=["address", "network", "functions", "events", "input"]
         )
 
+    def build_inputs(self, inputs: Dict) -> Dict:
+        # The verification prompt is filled from a dict of contract details
+        return dict(inputs)
+
 # Add new chain configuration
 SUPPORTED_CHAINS = {
     'polygon_amoy': {
@@ -1207,15 +3690,870 @@ SUPPORTED_CHAINS = {
     },
 }
 
+def chain_config_for(chain_id: int) -> Optional[Dict]:
+    for chain in SUPPORTED_CHAINS.values():
+        if chain['chain_id'] == chain_id:
+            return chain
+    return None
+
+# Add shared RPC provider registry
+class ProviderRegistry:
+    """One pooled AsyncWeb3 per RPC endpoint, kept alive for the life of the app.
+
+    Each endpoint gets its own aiohttp session with a bounded keep-alive connection
+    pool. Endpoints are probed by a background health check instead of per request.
+    """
+
+    def __init__(self, chains: Dict, pool_size: int = 20, health_interval: float = 30,
+                 request_timeout: float = 30):
+        self.chains = chains
+        self.pool_size = pool_size
+        self.health_interval = health_interval
+        self.request_timeout = request_timeout
+        self.providers: Dict[str, AsyncWeb3] = {}
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.health: Dict[str, Dict] = {}
+        self.lock: Optional[asyncio.Lock] = None
+        self.health_task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        self.lock = asyncio.Lock()
+        for chain in self.chains.values():
+            await self.for_url(chain['rpc_url'])
+        self.health_task = asyncio.create_task(self.health_loop())
+
+    async def stop(self):
+        if self.health_task:
+            self.health_task.cancel()
+            try:
+                await self.health_task
+            except asyncio.CancelledError:
+                pass
+            self.health_task = None
+        for session in self.sessions.values():
+            await session.close()
+        self.providers.clear()
+        self.sessions.clear()
+
+    async def for_url(self, rpc_url: str) -> AsyncWeb3:
+        """Return the shared provider for ``rpc_url``, creating it on first use"""
+        if rpc_url in self.providers:
+            return self.providers[rpc_url]
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        
+        async with self.lock:
+            if rpc_url not in self.providers:
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.pool_size),
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+                )
+                provider = AsyncWeb3.AsyncHTTPProvider(rpc_url)
+                await provider.cache_async_session(session)
+                self.sessions[rpc_url] = session
+                self.providers[rpc_url] = AsyncWeb3(provider)
+        return self.providers[rpc_url]
+
+    async def for_chain(self, chain_config: Dict) -> AsyncWeb3:
+        return await self.for_url(chain_config['rpc_url'])
+
+    def is_healthy(self, rpc_url: str) -> bool:
+        # Endpoints that have not been probed yet are given the benefit of the doubt
+        return self.health.get(rpc_url, {}).get('healthy', True)
+
+    async def check(self, rpc_url: str):
+        started = time.monotonic()
+        try:
+            w3 = self.providers[rpc_url]
+            block_number = await asyncio.wait_for(w3.eth.block_number, timeout=self.request_timeout)
+            self.health[rpc_url] = {
+                'healthy': True,
+                'block_number': block_number,
+                'latency': round(time.monotonic() - started, 3),
+                'checked_at': int(time.time())
+            }
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if self.is_healthy(rpc_url):
+                self.logger.warning(f"RPC endpoint {rpc_url} failed health check: {error}")
+            self.health[rpc_url] = {
+                'healthy': False,
+                'error': error,
+                'checked_at': int(time.time())
+            }
+
+    async def health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(rpc_url) for rpc_url in list(self.providers)))
+            await asyncio.sleep(self.health_interval)
+
+    def stats(self) -> Dict:
+        names = {chain['rpc_url']: name for name, chain in self.chains.items()}
+        return {
+            'pool_size': self.pool_size,
+            'endpoints': {
+                names.get(rpc_url, f'endpoint_{index}'): self.health.get(rpc_url, {'healthy': None})
+                for index, rpc_url in enumerate(self.providers)
+            }
+        }
+
+provider_registry = ProviderRegistry(
+    SUPPORTED_CHAINS,
+    pool_size=int(os.getenv("RPC_POOL_SIZE", "20")),
+    health_interval=float(os.getenv("RPC_HEALTH_INTERVAL", "30")),
+    request_timeout=float(os.getenv("RPC_TIMEOUT", "30"))
+)
+
+# Add block-pinned RPC result cache
+class RpcCache:
+    """Cache of read-only RPC results keyed by (chain_id, address, block number, call data).
+
+    Reads are pinned to a per-chain head that is refreshed at most every ``head_ttl``
+    seconds. When the head advances, entries more than ``reorg_depth`` blocks behind
+    it are dropped; when a reorg is detected, entries inside that window are dropped.
+    Non-empty contract bytecode is immutable, so it is kept in a separate LRU of
+    ``max_code_entries`` that the head does not expire.
+    """
+
+    def __init__(self, max_entries: int = 4096, reorg_depth: int = 12, head_ttl: float = 2.0,
+                 max_code_entries: int = 256):
+        self.max_entries = max_entries
+        self.max_code_entries = max_code_entries
+        self.reorg_depth = reorg_depth
+        self.head_ttl = head_ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.code: OrderedDict = OrderedDict()
+        self.heads: Dict[int, Dict] = {}
+        self.block_hashes: Dict[int, Dict[int, str]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reorgs = 0
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def make_key(chain_id: int, address: str, block_number: int, call_data: Any) -> tuple:
+        if isinstance(call_data, (bytes, bytearray)):
+            call_data = Web3.to_hex(call_data)
+        return (chain_id, address.lower(), block_number, call_data)
+
+    async def head(self, chain_id: int, w3: AsyncWeb3) -> int:
+        """Return the block number reads on ``chain_id`` should be pinned to"""
+        tracked = self.heads.get(chain_id)
+        if tracked and time.monotonic() - tracked['fetched'] < self.head_ttl:
+            return tracked['number']
+        
+        block = await w3.eth.get_block('latest')
+        self.observe_head(chain_id, block['number'], Web3.to_hex(block['hash']), Web3.to_hex(block['parentHash']))
+        return block['number']
+
+    def observe_head(self, chain_id: int, number: int, block_hash: str, parent_hash: str):
+        with self.lock:
+            hashes = self.block_hashes.setdefault(chain_id, {})
+            previous = self.heads.get(chain_id)
+            
+            reorged = (
+                hashes.get(number, block_hash) != block_hash
+                or hashes.get(number - 1, parent_hash) != parent_hash
+                or (previous is not None and number < previous['number'])
+            )
+            if reorged:
+                self.reorgs += 1
+                self.logger.warning(f"Reorg detected on chain {chain_id} at block {number}")
+                self._evict(chain_id, lambda block: block > number - self.reorg_depth)
+                for block in [block for block in hashes if block > number - self.reorg_depth]:
+                    del hashes[block]
+            elif previous is not None and number > previous['number']:
+                self._evict(chain_id, lambda block: block < number - self.reorg_depth)
+            
+            hashes[number - 1] = parent_hash
+            hashes[number] = block_hash
+            for block in [block for block in hashes if block < number - self.reorg_depth]:
+                del hashes[block]
+            
+            self.heads[chain_id] = {'number': number, 'hash': block_hash, 'fetched': time.monotonic()}
+
+    def _evict(self, chain_id: int, predicate):
+        for key in [key for key in self.entries if key[0] == chain_id and predicate(key[2])]:
+            del self.entries[key]
+
+    def get(self, chain_id: int, address: str, block_number: int, call_data: Any) -> Optional[Any]:
+        key = self.make_key(chain_id, address, block_number, call_data)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, chain_id: int, address: str, block_number: int, call_data: Any, value: Any):
+        key = self.make_key(chain_id, address, block_number, call_data)
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    async def get_code(self, chain_id: int, w3: AsyncWeb3, address: str) -> bytes:
+        key = (chain_id, address.lower())
+        with self.lock:
+            if key in self.code:
+                self.code.move_to_end(key)
+                self.hits += 1
+                return self.code[key]
+            self.misses += 1
+        
+        code = await w3.eth.get_code(address)
+        # Empty code may still be deployed later, so only real bytecode is kept
+        if code:
+            with self.lock:
+                self.code[key] = bytes(code)
+                while len(self.code) > self.max_code_entries:
+                    self.code.popitem(last=False)
+        return code
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'code_entries': len(self.code),
+            'max_code_entries': self.max_code_entries,
+            'reorg_depth': self.reorg_depth,
+            'hits': self.hits,
+            'misses': self.misses,
+            'reorgs': self.reorgs,
+            'heads': {chain_id: head['number'] for chain_id, head in self.heads.items()}
+        }
+
+rpc_cache = RpcCache(
+    max_entries=int(os.getenv("RPC_CACHE_SIZE", "4096")),
+    reorg_depth=int(os.getenv("RPC_REORG_DEPTH", "12")),
+    head_ttl=float(os.getenv("RPC_HEAD_TTL", "2")),
+    max_code_entries=int(os.getenv("RPC_CODE_CACHE_SIZE", "256"))
+)
+
+# Add incremental Transfer log index for contract monitoring
+class TransferIndex:
+    """SQLite-backed store of Transfer logs with a per-contract block cursor.
+
+    Each sync fetches only blocks after the cursor, re-reading the last
+    ``reorg_margin`` blocks so reorged logs are replaced, and prunes rows that fall
+    out of the analysis window. The window is also kept in memory as an
+    ``EventWindow`` so a tick only converts the newly fetched rows. A window is
+    reloaded from the database when another process has moved the cursor since,
+    and dropped after ``idle_ttl`` seconds without a sync.
+    """
+
+    TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text='Transfer(address,address,uint256)'))
+
+    def __init__(self, db_path: str, reorg_margin: int = 12, receipt_concurrency: int = 8,
+                 idle_ttl: float = 3600):
+        self.db_path = db_path
+        self.db: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+        self.reorg_margin = reorg_margin
+        self.receipt_concurrency = receipt_concurrency
+        self.idle_ttl = idle_ttl
+        self.chain_ids: Dict[int, int] = {}
+        # (chain_id, address) -> (window, cursor this process wrote, last sync time)
+        self.windows: Dict[tuple, tuple] = {}
+
+    def open(self):
+        """Create the database on first use; called from the app lifespan, not at import"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS transfer_cursors ("
+                "chain_id INTEGER NOT NULL, address TEXT NOT NULL, last_block INTEGER NOT NULL, "
+                "PRIMARY KEY (chain_id, address))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS transfers ("
+                "chain_id INTEGER NOT NULL, address TEXT NOT NULL, block_number INTEGER NOT NULL, "
+                "log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL, sender TEXT NOT NULL, "
+                "recipient TEXT NOT NULL, value TEXT NOT NULL, gas_used INTEGER, "
+                "PRIMARY KEY (chain_id, address, block_number, log_index))"
+            )
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+        self.windows.clear()
+
+    async def chain_id(self, w3: AsyncWeb3) -> int:
+        if id(w3) not in self.chain_ids:
+            self.chain_ids[id(w3)] = await w3.eth.chain_id
+        return self.chain_ids[id(w3)]
+
+    def cursor(self, chain_id: int, address: str) -> Optional[int]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT last_block FROM transfer_cursors WHERE chain_id = ? AND address = ?",
+                (chain_id, address)
+            ).fetchone()
+        return row[0] if row else None
+
+    def stored_gas_used(self, chain_id: int, address: str, from_block: int) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.db.execute(
+                "SELECT tx_hash, gas_used FROM transfers WHERE chain_id = ? AND address = ? "
+                "AND block_number >= ? AND gas_used IS NOT NULL",
+                (chain_id, address, from_block)
+            ).fetchall())
+
+    async def fetch_gas_used(self, w3: AsyncWeb3, tx_hashes: List[str]) -> Dict[str, Optional[int]]:
+        semaphore = asyncio.Semaphore(self.receipt_concurrency)
+        
+        async def fetch(tx_hash: str) -> Optional[int]:
+            async with semaphore:
+                try:
+                    return (await w3.eth.get_transaction_receipt(tx_hash))['gasUsed']
+                except Exception:
+                    return None
+        
+        gas_used = await asyncio.gather(*(fetch(tx_hash) for tx_hash in tx_hashes))
+        return dict(zip(tx_hashes, gas_used))
+
+    async def sync(self, contract: Any, blocks_to_analyze: int, chain_id: Optional[int] = None) -> 'EventWindow':
+        """Index new Transfer logs for ``contract`` and return the stored window.
+
+        ``chain_id`` is the configured chain the contract is monitored on; it defaults
+        to the one the node reports.
+        """
+        w3 = contract.w3
+        if chain_id is None:
+            chain_id = await self.chain_id(w3)
+        address = contract.address.lower()
+        latest_block = await w3.eth.block_number
+        window_start = max(0, latest_block - blocks_to_analyze)
+        
+        cursor = self.cursor(chain_id, address)
+        from_block = window_start if cursor is None else max(window_start, cursor - self.reorg_margin + 1)
+        
+        rows = []
+        if from_block <= latest_block:
+            logs = await w3.eth.get_logs({
+                'address': contract.address,
+                'topics': [self.TRANSFER_TOPIC],
+                'fromBlock': from_block,
+                'toBlock': latest_block
+            })
+            
+            transfer = contract.events.Transfer()
+            for log in logs:
+                # ERC-20 and ERC-721 name the arguments differently; their order is fixed
+                args = list(transfer.process_log(log)['args'].values())
+                rows.append((
+                    chain_id, address, log['blockNumber'], log['logIndex'],
+                    Web3.to_hex(log['transactionHash']), args[0].lower(), args[1].lower(), str(args[2])
+                ))
+            
+            # Re-read blocks keep the gas already stored; only new transactions need receipts
+            gas_used = self.stored_gas_used(chain_id, address, from_block)
+            missing = list({row[4] for row in rows} - gas_used.keys())
+            gas_used.update(await self.fetch_gas_used(w3, missing))
+            rows = [row + (gas_used[row[4]],) for row in rows]
+        
+        with self.lock:
+            # Rows at or after from_block are replaced by the fresh fetch
+            self.db.execute(
+                "DELETE FROM transfers WHERE chain_id = ? AND address = ? AND (block_number >= ? OR block_number < ?)",
+                (chain_id, address, from_block, window_start)
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO transfers (chain_id, address, block_number, log_index, tx_hash, "
+                "sender, recipient, value, gas_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO transfer_cursors (chain_id, address, last_block) VALUES (?, ?, ?)",
+                (chain_id, address, latest_block)
+            )
+            self.db.commit()
+        
+        now = time.monotonic()
+        self.evict_idle(now)
+        cached = self.windows.get((chain_id, address))
+        if cached is None or cached[1] != cursor:
+            # First sync in this process, or another process synced in between: load from the database
+            window = self.load_window(chain_id, address, window_start)
+        else:
+            window = cached[0]
+            window.retain(window_start, before_block=from_block)
+            window.append([row[2:3] + row[4:] for row in rows])
+        window.start_block = window_start
+        window.head_block = latest_block
+        self.windows[(chain_id, address)] = (window, latest_block, now)
+        return window
+
+    def evict_idle(self, now: float):
+        for key in [key for key, (_, _, used) in self.windows.items() if now - used > self.idle_ttl]:
+            del self.windows[key]
+
+    def forget(self, chain_id: int, address: str):
+        """Drop a contract's window and stored transfers, e.g. when it is no longer monitored"""
+        address = address.lower()
+        self.windows.pop((chain_id, address), None)
+        with self.lock:
+            self.db.execute("DELETE FROM transfers WHERE chain_id = ? AND address = ?", (chain_id, address))
+            self.db.execute("DELETE FROM transfer_cursors WHERE chain_id = ? AND address = ?", (chain_id, address))
+            self.db.commit()
+
+    def load_window(self, chain_id: int, address: str, from_block: int) -> 'EventWindow':
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT block_number, tx_hash, sender, recipient, value, gas_used "
+                "FROM transfers WHERE chain_id = ? AND address = ? AND block_number >= ? "
+                "ORDER BY block_number, log_index",
+                (chain_id, address, from_block)
+            ).fetchall()
+        window = EventWindow(from_block)
+        window.append(rows)
+        return window
+
+# Add columnar event window for vectorized monitoring analytics
+class EventWindow:
+    """Column arrays over a window of Transfer events: block, sender, recipient, value and gas used.
+
+    Addresses are dictionary-encoded to integer codes, so every statistic is a NumPy
+    reduction rather than a Python loop. Gas is set only on a transaction's first
+    transfer (NaN on the rest); a transaction never spans blocks, so trimming by
+    block keeps that intact. The window spans ``start_block`` to ``head_block``
+    even when the most recent blocks had no transfers.
+    """
+
+    def __init__(self, start_block: Optional[int] = None, head_block: Optional[int] = None):
+        self.start_block = start_block
+        self.head_block = head_block
+        self.codes: Dict[str, int] = {}
+        self.addresses: List[str] = []
+        self.blocks = np.zeros(0, dtype=np.int64)
+        self.senders = np.zeros(0, dtype=np.int64)
+        self.recipients = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.float64)
+        self.gas_used = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def from_events(cls, events: List[Dict], start_block: Optional[int] = None,
+                    head_block: Optional[int] = None) -> 'EventWindow':
+        window = cls(start_block, head_block)
+        window.append([
+            (event['block_number'], event['tx_hash'], event['from'], event['to'], event['value'], event.get('gas_used'))
+            for event in events
+        ])
+        return window
+
+    def append(self, rows: List[tuple]):
+        """Add (block, tx_hash, sender, recipient, value, gas_used) rows covering whole blocks"""
+        count = len(rows)
+        if not count:
+            return
+        
+        blocks = np.empty(count, dtype=np.int64)
+        senders = np.empty(count, dtype=np.int64)
+        recipients = np.empty(count, dtype=np.int64)
+        # uint256 values do not fit int64; float64 keeps magnitude, which is all the statistics need
+        values = np.empty(count, dtype=np.float64)
+        gas_used = np.full(count, np.nan)
+        seen_txs = set()
+        for index, (block_number, tx_hash, sender, recipient, value, gas) in enumerate(rows):
+            blocks[index] = block_number
+            values[index] = float(value)
+            senders[index] = self.code(sender)
+            recipients[index] = self.code(recipient)
+            if gas is not None and tx_hash not in seen_txs:
+                gas_used[index] = gas
+            seen_txs.add(tx_hash)
+        
+        self.blocks = np.concatenate((self.blocks, blocks))
+        self.senders = np.concatenate((self.senders, senders))
+        self.recipients = np.concatenate((self.recipients, recipients))
+        self.values = np.concatenate((self.values, values))
+        self.gas_used = np.concatenate((self.gas_used, gas_used))
+
+    def code(self, address: str) -> int:
+        code = self.codes.get(address)
+        if code is None:
+            code = self.codes[address] = len(self.addresses)
+            self.addresses.append(address)
+        return code
+
+    def retain(self, start_block: int, before_block: Optional[int] = None):
+        """Drop transfers before ``start_block`` and, for a re-read, from ``before_block`` on"""
+        keep = self.blocks >= start_block
+        if before_block is not None:
+            keep &= self.blocks < before_block
+        self.blocks = self.blocks[keep]
+        self.senders = self.senders[keep]
+        self.recipients = self.recipients[keep]
+        self.values = self.values[keep]
+        self.gas_used = self.gas_used[keep]
+        self.start_block = start_block
+        
+        # Re-encode once most known addresses no longer appear in the window
+        if len(self.addresses) > 1024 and len(self.addresses) > 4 * len(self):
+            used = np.unique(np.concatenate((self.senders, self.recipients)))
+            remap = np.zeros(len(self.addresses), dtype=np.int64)
+            remap[used] = np.arange(len(used))
+            self.senders = remap[self.senders]
+            self.recipients = remap[self.recipients]
+            self.addresses = [self.addresses[code] for code in used]
+            self.codes = {address: code for code, address in enumerate(self.addresses)}
+
+    def tx_gas_used(self) -> np.ndarray:
+        """Gas used per distinct transaction with a known receipt"""
+        return self.gas_used[~np.isnan(self.gas_used)]
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def block_counts(self) -> np.ndarray:
+        """Transfers per block from the start of the window up to the head"""
+        start = self.start_block if self.start_block is not None else (int(self.blocks.min()) if len(self) else 0)
+        end = self.head_block if self.head_block is not None else (int(self.blocks.max()) if len(self) else start - 1)
+        if end < start:
+            return np.zeros(0, dtype=np.int64)
+        return np.bincount(self.blocks - start, minlength=end - start + 1)
+
+    def rolling_volume(self, window_blocks: int) -> np.ndarray:
+        """Transfers in each run of ``window_blocks`` consecutive blocks"""
+        counts = self.block_counts()
+        if len(counts) < window_blocks:
+            return np.array([counts.sum()], dtype=np.int64)
+        totals = np.concatenate(([0], np.cumsum(counts)))
+        return totals[window_blocks:] - totals[:-window_blocks]
+
+    def volume_zscore(self, window_blocks: int) -> float:
+        """How far the most recent rolling window sits from the window's rolling mean"""
+        rolling = self.rolling_volume(window_blocks)
+        std = rolling.std()
+        return float((rolling[-1] - rolling.mean()) / std) if std > 0 else 0.0
+
+    def top_senders(self, limit: int = 5) -> List[Dict]:
+        if not len(self):
+            return []
+        counts = np.bincount(self.senders, minlength=len(self.addresses))
+        top = np.argsort(counts)[::-1][:limit]
+        return [{
+            'address': self.addresses[code],
+            'transfers': int(counts[code]),
+            'share': float(counts[code] / len(self))
+        } for code in top if counts[code]]
+
+    def value_outliers(self, threshold: float) -> int:
+        """Transfers whose log-scaled value is more than ``threshold`` deviations above the mean"""
+        scaled = np.log10(self.values + 1)
+        std = scaled.std()
+        if std == 0:
+            return 0
+        return int(np.count_nonzero((scaled - scaled.mean()) / std > threshold))
+
+transfer_index = TransferIndex(
+    os.getenv("TRANSFER_INDEX_DB", ".cache/transfers.sqlite3"),
+    reorg_margin=int(os.getenv("TRANSFER_INDEX_REORG_MARGIN", "12")),
+    idle_ttl=float(os.getenv("TRANSFER_INDEX_IDLE_TTL", "3600"))
+)
+
+# Add monitored contract registry
+class MonitorStore:
+    """SQLite-backed registry of monitored contracts and their recent health checks.
+
+    Contracts are keyed by chain ID; the RPC endpoint comes from ``SUPPORTED_CHAINS``,
+    so callers can never point the monitor at an arbitrary URL.
+    """
+
+    def __init__(self, db_path: str, max_contracts: int = 100, max_results: int = 100):
+        self.db_path = db_path
+        self.db: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+        self.max_contracts = max_contracts
+        self.max_results = max_results
+
+    def open(self):
+        """Create the database on first use; called from the app lifespan, not at import"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS monitored_contracts ("
+                "chain_id INTEGER NOT NULL, address TEXT NOT NULL, abi TEXT NOT NULL, "
+                "monitoring_config TEXT NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (chain_id, address))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS monitoring_results ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, chain_id INTEGER NOT NULL, address TEXT NOT NULL, "
+                "checked REAL NOT NULL, status TEXT NOT NULL, result TEXT NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS monitoring_results_contract "
+                "ON monitoring_results (chain_id, address, id)"
+            )
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def add_contract(self, chain_id: int, address: str, abi: List[Dict], monitoring_config: Dict) -> bool:
+        """Register or update a contract; returns False when the registry is full"""
+        with self.lock:
+            exists = self.db.execute(
+                "SELECT 1 FROM monitored_contracts WHERE chain_id = ? AND address = ?", (chain_id, address)
+            ).fetchone()
+            count = self.db.execute("SELECT COUNT(*) FROM monitored_contracts").fetchone()[0]
+            if not exists and count >= self.max_contracts:
+                return False
+            self.db.execute(
+                "INSERT OR REPLACE INTO monitored_contracts "
+                "(chain_id, address, abi, monitoring_config, created) VALUES (?, ?, ?, ?, ?)",
+                (chain_id, address, json.dumps(abi), json.dumps(monitoring_config), time.time())
+            )
+            self.db.commit()
+        return True
+
+    def remove_contract(self, chain_id: int, address: str) -> bool:
+        with self.lock:
+            cursor = self.db.execute(
+                "DELETE FROM monitored_contracts WHERE chain_id = ? AND address = ?",
+                (chain_id, address)
+            )
+            self.db.commit()
+        return cursor.rowcount > 0
+
+    def list_contracts(self) -> List[Dict]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT chain_id, address, abi, monitoring_config FROM monitored_contracts ORDER BY created"
+            ).fetchall()
+        return [{
+            'chain_id': row[0],
+            'address': row[1],
+            'abi': json.loads(row[2]),
+            'monitoring_config': json.loads(row[3])
+        } for row in rows]
+
+    def add_result(self, chain_id: int, address: str, health_check: Dict):
+        """Record one health check and drop checks older than the newest ``max_results``"""
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO monitoring_results (chain_id, address, checked, status, result) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chain_id, address, time.time(), health_check['status'], json.dumps(health_check, default=str))
+            )
+            self.db.execute(
+                "DELETE FROM monitoring_results WHERE chain_id = ? AND address = ? AND id NOT IN "
+                "(SELECT id FROM monitoring_results WHERE chain_id = ? AND address = ? "
+                "ORDER BY id DESC LIMIT ?)",
+                (chain_id, address, chain_id, address, self.max_results)
+            )
+            self.db.commit()
+
+    def results(self, chain_id: int, address: str, limit: int = 20) -> List[Dict]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT result FROM monitoring_results WHERE chain_id = ? AND address = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (chain_id, address, min(limit, self.max_results))
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+monitor_store = MonitorStore(
+    os.getenv("MONITOR_DB_PATH", ".cache/monitoring.sqlite3"),
+    max_contracts=int(os.getenv("MONITOR_MAX_CONTRACTS", "100")),
+    max_results=int(os.getenv("MONITOR_RESULT_RETENTION", "100"))
+)
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+MULTICALL3_ABI = [{
+    'name': 'aggregate3',
+    'type': 'function',
+    'stateMutability': 'payable',
+    'inputs': [{
+        'name': 'calls',
+        'type': 'tuple[]',
+        'components': [
+            {'name': 'target', 'type': 'address'},
+            {'name': 'allowFailure', 'type': 'bool'},
+            {'name': 'callData', 'type': 'bytes'}
+        ]
+    }],
+    'outputs': [{
+        'name': 'returnData',
+        'type': 'tuple[]',
+        'components': [
+            {'name': 'success', 'type': 'bool'},
+            {'name': 'returnData', 'type': 'bytes'}
+        ]
+    }]
+}]
+
+def decode_revert_reason(return_data: bytes) -> str:
+    """Decode Error(string) / Panic(uint256) revert data the way web3 reports it"""
+    if return_data[:4] == bytes.fromhex('08c379a0'):
+        try:
+            return f"execution reverted: {Web3().codec.decode(['string'], return_data[4:])[0]}"
+        except Exception:
+            pass
+    elif return_data[:4] == bytes.fromhex('4e487b71'):
+        try:
+            return f"execution reverted: Panic({Web3().codec.decode(['uint256'], return_data[4:])[0]})"
+        except Exception:
+            pass
+    return 'execution reverted'
+
+def decode_function_result(w3: AsyncWeb3, func: Any, return_data: bytes) -> Any:
+    output_types = [collapse_if_tuple(output) for output in func.abi.get('outputs', [])]
+    result = w3.codec.decode(output_types, return_data)
+    # Match web3: a single output is returned unwrapped
+    return result[0] if len(result) == 1 else list(result)
+
+async def batch_read_view_functions(w3: AsyncWeb3, contract: Any, block_number: int,
+                                    chain_id: Optional[int] = None) -> List[Dict]:
+    """Read every zero-argument view/pure function in one Multicall3 call pinned to ``block_number``.
+
+    Falls back to one call per function (still pinned) if Multicall3 is unavailable.
+    Errors are decoded per function. With a ``chain_id``, raw results are served from
+    and stored in the block-pinned RPC cache.
+    """
+    functions_info = []
+    batch = []
+    for func in contract.all_functions():
+        if func.abi['stateMutability'] not in ['view', 'pure']:
+            continue
+        if func.abi.get('inputs'):
+            functions_info.append({
+                "name": func.abi['name'],
+                "type": func.abi['stateMutability'],
+                "error": f"Function requires {len(func.abi['inputs'])} argument(s)"
+            })
+            continue
+        batch.append(func)
+    
+    call_data = [func()._encode_transaction_data() for func in batch]
+    results = [
+        rpc_cache.get(chain_id, contract.address, block_number, data) if chain_id is not None else None
+        for data in call_data
+    ]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        try:
+            fetched = await multicall.functions.aggregate3([
+                (contract.address, True, call_data[index])
+                for index in missing
+            ]).call(block_identifier=block_number)
+            for index, result in zip(missing, fetched):
+                results[index] = (result[0], bytes(result[1]))
+                if chain_id is not None:
+                    rpc_cache.put(chain_id, contract.address, block_number, call_data[index], results[index])
+        except Exception as e:
+            logging.getLogger(__name__).info(f"Multicall3 unavailable, reading functions one by one: {str(e)}")
+    
+    for index, func in enumerate(batch):
+        try:
+            if results[index] is None:
+                # Raw eth_call so the result is cached like a Multicall3 entry
+                return_data = bytes(await w3.eth.call(
+                    {'to': contract.address, 'data': call_data[index]}, block_identifier=block_number
+                ))
+                if chain_id is not None:
+                    rpc_cache.put(chain_id, contract.address, block_number, call_data[index], (True, return_data))
+                result = decode_function_result(w3, func, return_data)
+            else:
+                success, return_data = results[index]
+                if not success:
+                    raise ContractLogicError(decode_revert_reason(return_data))
+                result = decode_function_result(w3, func, return_data)
+            
+            functions_info.append({
+                "name": func.abi['name'],
+                "type": func.abi['stateMutability'],
+                "result": result
+            })
+        except Exception as e:
+            functions_info.append({
+                "name": func.abi['name'],
+                "type": func.abi['stateMutability'],
+                "error": str(e)
+            })
+    
+    return functions_info
+
+def build_event_decoders(contract: Any) -> Dict[str, tuple]:
+    """Map each non-anonymous event's topic0 to its full signature and ABI.
+
+    Keyed by signature rather than name so overloaded events stay apart.
+    """
+    decoders = {}
+    for item in contract.abi:
+        if item.get('type') != 'event' or item.get('anonymous'):
+            continue
+        signature = f"{item['name']}({','.join(collapse_if_tuple(arg) for arg in item.get('inputs', []))})"
+        decoders[Web3.to_hex(Web3.keccak(text=signature))] = (signature, item)
+    return decoders
+
+async def summarize_contract_events(w3: AsyncWeb3, contract: Any, from_block: int, to_block: int,
+                                    chain_id: Optional[int] = None) -> List[Dict]:
+    """Count and sample every ABI event from a single eth_getLogs over the contract's address.
+
+    Events are summarized per signature, so overloads of one name are counted separately.
+    """
+    decoders = build_event_decoders(contract)
+    events = [(signature, item['name']) for signature, item in decoders.values()]
+    window = f'logs:{from_block}'
+    logs = rpc_cache.get(chain_id, contract.address, to_block, window) if chain_id is not None else None
+    if logs is None:
+        try:
+            logs = await w3.eth.get_logs({
+                'address': contract.address,
+                'fromBlock': from_block,
+                'toBlock': to_block
+            })
+        except Exception as e:
+            return [{"name": name, "signature": signature, "error": str(e)} for signature, name in events]
+        if chain_id is not None:
+            rpc_cache.put(chain_id, contract.address, to_block, window, logs)
+    
+    summary = {
+        signature: {"name": name, "signature": signature, "count": 0, "recent_events": []}
+        for signature, name in events
+    }
+    for log in logs:
+        if not log['topics']:
+            continue
+        decoder = decoders.get(Web3.to_hex(log['topics'][0]))
+        if decoder is None:
+            continue
+        
+        signature, event_abi = decoder
+        entry = summary[signature]
+        entry['count'] += 1
+        if len(entry['recent_events']) < 5:
+            try:
+                decoded = get_event_data(w3.codec, event_abi, log)
+                entry['recent_events'].append(json.loads(Web3.to_json(decoded['args'])))
+            except Exception as e:
+                entry['error'] = str(e)
+    
+    return list(summary.values())
+
 async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncGenerator[str, None]:
     """Stream the contract verification process using SSE format"""
     try:
         # Get chain config based on chain_id
-        chain_config = None
-        for chain in SUPPORTED_CHAINS.values():
-            if chain['chain_id'] == request.chain_id:
-                chain_config = chain
-                break
+        chain_config = chain_config_for(request.chain_id)
         
         if not chain_config:
             yield "event: error\ndata: " + json.dumps({
@@ -1227,7 +4565,7 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             return
 
         # Initialize verification agent
-        verifier = ContractVerificationAgent("Verifier", "Smart Contract Verification Specialist")
+        verifier = agent_pool.verification_agent(use_cache=not request.bypass_cache)
         
         yield "event: status\ndata: " + json.dumps({
             'agent': 'Verifier',
@@ -1236,10 +4574,10 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             'data': {'chain': chain_config['name']}
         }) + "\n\n"
 
-        # Connect to network using chain-specific RPC
-        w3 = Web3(Web3.HTTPProvider(chain_config['rpc_url']))
+        # Reuse the chain's pooled provider; reachability comes from the background health check
+        w3 = await provider_registry.for_chain(chain_config)
         
-        if not w3.is_connected():
+        if not provider_registry.is_healthy(chain_config['rpc_url']):
             yield "event: error\ndata: " + json.dumps({
                 'agent': 'Verifier',
                 'action': 'Network connection',
@@ -1267,22 +4605,10 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             'status': 'in_progress'
         }) + "\n\n"
 
-        functions_info = []
-        for func in contract.all_functions():
-            try:
-                if func.abi['stateMutability'] in ['view', 'pure']:
-                    result = func().call()
-                    functions_info.append({
-                        "name": func.abi['name'],
-                        "type": func.abi['stateMutability'],
-                        "result": result
-                    })
-            except Exception as e:
-                functions_info.append({
-                    "name": func.abi['name'],
-                    "type": func.abi['stateMutability'],
-                    "error": str(e)
-                })
+        # Pin every read to one block so the results are consistent
+        async with admission.limit('rpc'):
+            latest_block = await rpc_cache.head(chain_config['chain_id'], w3)
+            functions_info = await batch_read_view_functions(w3, contract, latest_block, chain_config['chain_id'])
 
         yield "event: status\ndata: " + json.dumps({
             'agent': 'Verifier',
@@ -1298,23 +4624,13 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             'status': 'in_progress'
         }) + "\n\n"
 
-        latest_block = w3.eth.block_number
         start_block = max(0, latest_block - 1000)
-        events_info = []
-
-        for event in contract.events:
-            try:
-                events = event.get_logs(fromBlock=start_block, toBlock='latest')
-                events_info.append({
-                    "name": event.event_name,
-                    "count": len(events),
-                    "recent_events": [evt.args for evt in events[:5]]
-                })
-            except Exception as e:
-                events_info.append({
-                    "name": event.event_name,
-                    "error": str(e)
-                })
+        
+        # One log query for the whole window, routed to events locally by topic
+        async with admission.limit('rpc'):
+            events_info = await summarize_contract_events(
+                w3, contract, start_block, latest_block, chain_config['chain_id']
+            )
 
         yield "event: status\ndata: " + json.dumps({
             'agent': 'Verifier',
@@ -1330,7 +4646,7 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             'status': 'in_progress'
         }) + "\n\n"
 
-        analysis = verifier.process({
+        analysis = await verifier.aprocess({
             "address": request.contract_address,
             "network": chain_config['name'],
             "chain_id": request.chain_id,
@@ -1347,6 +4663,11 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
             'data': {'analysis': analysis}
         }) + "\n\n"
 
+        async with admission.limit('rpc'):
+            code = await rpc_cache.get_code(
+                chain_config['chain_id'], w3, w3.to_checksum_address(request.contract_address)
+            )
+
         # Final summary
         yield "event: status\ndata: " + json.dumps({
             'agent': 'Verifier',
@@ -1363,12 +4684,19 @@ async def stream_contract_verification(request: ContractVerifyRequest) -> AsyncG
                     'chain_id': chain_config['chain_id'],
                     'explorer_url': chain_config['explorer_url'],
                     'latest_block': latest_block,
-                    'contract_code_exists': bool(w3.eth.get_code(w3.to_checksum_address(request.contract_address)))
+                    'contract_code_exists': bool(code)
                 },
                 'ai_analysis': analysis
             }
         }) + "\n\n"
 
+    except AdmissionRejected as e:
+        yield "event: error\ndata: " + json.dumps({
+            'agent': 'Verifier',
+            'action': 'Verification failed',
+            'status': 'error',
+            'data': {'error': str(e), 'retry_after': e.retry_after}
+        }) + "\n\n"
     except Exception as e:
         yield "event: error\ndata: " + json.dumps({
             'agent': 'Verifier',
@@ -1382,6 +4710,7 @@ async def verify_contract(request: ContractVerifyRequest):
     """
     Stream the contract verification process using Server-Sent Events
     """
+    admission.check('rpc', 'llm')
     return StreamingResponse(
         stream_contract_verification(request),
         media_type="text/event-stream",
@@ -1394,12 +4723,16 @@ async def verify_contract(request: ContractVerifyRequest):
 
 # Add new autonomous error recovery class
 class AutoErrorRecovery:
-    def __init__(self):
-        self.llm = ChatXAI(model="grok-beta")
+    def __init__(self, llm: Optional[ChatXAI] = None):
+        self.llm = llm or ChatXAI(model="grok-beta")
         self.recovery_attempts = {}
         self.max_attempts = 3
 
-    async def attempt_recovery(self, error: str, context: Dict) -> Dict:
+    def fork(self) -> 'AutoErrorRecovery':
+        """Create a copy that shares the LLM client but counts attempts from zero"""
+        return type(self)(llm=self.llm)
+
+    async def attempt_recovery(self, error: str, context: Dict, use_cache: bool = True) -> Dict:
         """Autonomously analyze and attempt to recover from errors"""
         error_hash = hash(f"{error}_{context.get('stage', 'unknown')}")
         
@@ -1428,7 +4761,7 @@ class AutoErrorRecovery:
         """
 
         try:
-            response = await self.llm.ainvoke(recovery_prompt)
+            response = await cached_ainvoke(self.llm, "AutoErrorRecovery", recovery_prompt, use_cache)
             recovery_plan = json.loads(response)
             
             if recovery_plan['confidence_score'] < 0.5:
@@ -1443,6 +4776,8 @@ class AutoErrorRecovery:
                 'attempt': self.recovery_attempts[error_hash]
             }
 
+        except AdmissionRejected:
+            raise
         except Exception as e:
             return {
                 'status': 'failed',
@@ -1451,11 +4786,16 @@ class AutoErrorRecovery:
 
 # Add autonomous contract optimization class
 class ContractOptimizer:
-    def __init__(self):
-        self.llm = ChatXAI(model="grok-beta")
+    def __init__(self, llm: Optional[ChatXAI] = None):
+        self.llm = llm or ChatXAI(model="grok-beta")
         
-    async def optimize_contract(self, contract_code: str, gas_analysis: Dict) -> Dict:
-        """Autonomously optimize contract for gas efficiency"""
+    async def optimize_contract(self, contract_code: str, gas_analysis: Dict, use_cache: bool = True,
+                                settings: Optional[Dict] = None) -> Dict:
+        """Autonomously optimize contract for gas efficiency.
+
+        ``gas_analysis`` is the profile of the shipped build of ``contract_code`` and
+        ``settings`` the solc settings it was built with (None for the defaults).
+        """
         optimization_prompt = f"""
         Analyze and optimize this contract for gas efficiency:
         
@@ -1476,13 +4816,26 @@ class ContractOptimizer:
         """
         
         try:
-            response = await self.llm.ainvoke(optimization_prompt)
+            response = await cached_ainvoke(self.llm, "ContractOptimizer", optimization_prompt, use_cache)
             optimization_result = json.loads(response)
             
+            # Measure before asking the model about safety; most rejections are cheap to find
+            benchmark = await self.benchmark_optimization(
+                contract_code, optimization_result['optimized_code'],
+                original_profile=gas_analysis, settings=settings
+            )
+            if benchmark['status'] != 'unavailable' and not benchmark['accepted']:
+                return {
+                    'status': 'failed',
+                    'message': f"Optimization rejected: {benchmark['reason']}",
+                    'details': benchmark
+                }
+            
             # Verify optimizations don't introduce vulnerabilities
             security_check = await self.verify_optimizations(
                 original_code=contract_code,
-                optimized_code=optimization_result['optimized_code']
+                optimized_code=optimization_result['optimized_code'],
+                use_cache=use_cache
             )
             
             if not security_check['is_safe']:
@@ -1496,16 +4849,90 @@ class ContractOptimizer:
                 'status': 'success',
                 'optimized_code': optimization_result['optimized_code'],
                 'improvements': optimization_result['optimizations'],
-                'estimated_savings': optimization_result['estimated_savings']
+                'estimated_savings': optimization_result['estimated_savings'],
+                'measured_savings': benchmark.get('total_savings'),
+                'benchmark': benchmark
             }
             
+        except AdmissionRejected:
+            raise
         except Exception as e:
             return {
                 'status': 'failed',
                 'message': f'Optimization failed: {str(e)}'
             }
+
+    async def benchmark_optimization(self, original_code: str, optimized_code: str,
+                                     original_profile: Optional[Dict] = None,
+                                     settings: Optional[Dict] = None) -> Dict:
+        """Compile and profile both versions and accept only a cheaper, equivalent build.
+
+        Both are built with ``settings`` so the comparison is against the shipped build,
+        whose profile is reused from ``original_profile`` when it was measured. The ABIs
+        must match, every function must behave the same on the example call suite, and
+        deployment plus function gas must be strictly lower. Without eth-tester the
+        result has status ``unavailable`` and no verdict.
+        """
+        original, optimized = await asyncio.gather(
+            acompile_contract(original_code, settings=settings),
+            acompile_contract(optimized_code, settings=settings)
+        )
+        if optimized['status'] != 'success':
+            return {'status': 'rejected', 'accepted': False, 'reason': 'optimized contract does not compile',
+                    'diagnostics': optimized.get('diagnostics', [])}
+        if original['status'] != 'success':
+            return {'status': 'rejected', 'accepted': False, 'reason': 'original contract does not compile'}
+        
+        def normalize_abi(abi: List[Dict]) -> List[str]:
+            return sorted(json.dumps(item, sort_keys=True) for item in abi)
+        
+        if normalize_abi(original['abi']) != normalize_abi(optimized['abi']):
+            return {'status': 'rejected', 'accepted': False, 'reason': 'optimized contract changes the ABI'}
+        
+        if EthereumTester is None:
+            return {'status': 'unavailable', 'accepted': None,
+                    'reason': 'benchmark unavailable: gas profiling requires eth-tester with the py-evm backend'}
+        
+        if original_profile is not None and original_profile.get('status') == 'success':
+            before = original_profile
+            after = await aprofile_gas(optimized['abi'], optimized['bytecode'])
+        else:
+            before, after = await asyncio.gather(
+                aprofile_gas(original['abi'], original['bytecode']),
+                aprofile_gas(optimized['abi'], optimized['bytecode'])
+            )
+        if before['status'] != 'success' or after['status'] != 'success':
+            failed = before if before['status'] != 'success' else after
+            return {'status': 'rejected', 'accepted': False,
+                    'reason': f"gas profiling failed: {failed.get('message')}"}
+        
+        functions = {}
+        mismatches = []
+        for signature, entry in before['functions'].items():
+            other = after['functions'].get(signature, {})
+            # Revert reasons may be reworded; only whether a call reverts has to match
+            if ('error' in entry) != ('error' in other) or entry.get('result') != other.get('result'):
+                mismatches.append(signature)
+            functions[signature] = {'original': entry.get('gas'), 'optimized': other.get('gas')}
+        
+        total_before = before['deployment_gas'] + before['total_function_gas']
+        total_after = after['deployment_gas'] + after['total_function_gas']
+        benchmark = {
+            'deployment_gas': {'original': before['deployment_gas'], 'optimized': after['deployment_gas']},
+            'functions': functions,
+            'total_savings': total_before - total_after,
+            'behavior_mismatches': mismatches
+        }
+        
+        if mismatches:
+            return {**benchmark, 'status': 'rejected', 'accepted': False,
+                    'reason': f"behavior differs for {', '.join(mismatches)}"}
+        if total_after >= total_before:
+            return {**benchmark, 'status': 'rejected', 'accepted': False, 'reason': 'optimized contract is not cheaper'}
+        return {**benchmark, 'status': 'accepted', 'accepted': True,
+                'reason': 'cheaper and equivalent on the example call suite'}
             
-    async def verify_optimizations(self, original_code: str, optimized_code: str) -> Dict:
+    async def verify_optimizations(self, original_code: str, optimized_code: str, use_cache: bool = True) -> Dict:
         """Verify optimizations don't introduce vulnerabilities"""
         verification_prompt = f"""
         Compare original and optimized contracts for security:
@@ -1526,8 +4953,10 @@ class ContractOptimizer:
         """
         
         try:
-            response = await self.llm.ainvoke(verification_prompt)
+            response = await cached_ainvoke(self.llm, "OptimizationVerifier", verification_prompt, use_cache)
             return json.loads(response)
+        except AdmissionRejected:
+            raise
         except Exception as e:
             return {
                 'is_safe': False,
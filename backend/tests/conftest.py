@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Keep the SQLite stores and caches that main.py opens out of the working tree
+_state_dir = tempfile.mkdtemp(prefix='contract-generator-tests-')
+for name, filename in (
+    ('COMPILE_CACHE_DIR', 'compilation'),
+    ('JOB_DB_PATH', 'jobs.sqlite3'),
+    ('TRANSFER_INDEX_DB', 'transfers.sqlite3'),
+    ('MONITOR_DB_PATH', 'monitoring.sqlite3'),
+):
+    os.environ.setdefault(name, os.path.join(_state_dir, filename))
+os.environ.setdefault('XAI_API_KEY', 'test')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from solcx.exceptions import SolcError
+
+import main
+from main import CompilationCache, acompile_batch, compile_batch
+
+GOOD = 'contract Good {}\n'
+BAD = 'contract Bad { uint x = ; }\n'
+IMPORTER = 'import "Good.sol";\ncontract Child is Good {}\n'
+
+
+class FakeSolc:
+    """compile_standard stand-in that fails whenever Bad.sol is part of the input"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def __call__(self, input_data, solc_version):
+        names = sorted(input_data['sources'])
+        self.inputs.append(names)
+        if 'Bad.sol' in names:
+            errors = [{
+                'severity': 'error', 'type': 'ParserError', 'message': 'Expected expression',
+                'formattedMessage': 'ParserError: Expected expression',
+                'sourceLocation': {'file': 'Bad.sol', 'start': 24, 'end': 25}
+            }]
+            raise SolcError('compilation failed', stdout_data=json.dumps({'errors': errors}))
+        return {
+            'contracts': {
+                name: {name[:-4]: {'abi': [], 'evm': {'bytecode': {'object': f'{name}-bytecode'}}}}
+                for name in names
+            },
+            'sources': {name: {'ast': {'absolutePath': name}} for name in names}
+        }
+
+
+@pytest.fixture
+def solc(monkeypatch):
+    fake = FakeSolc()
+    monkeypatch.setattr(main, 'compile_standard', fake)
+    return fake
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    async def run(fn, *args, timeout=None):
+        return fn(*args)
+    monkeypatch.setattr(main.compile_executor, 'run', run)
+    monkeypatch.setattr(main, 'compilation_cache', CompilationCache())
+
+
+def test_failing_source_does_not_stop_the_others(solc):
+    results = compile_batch({'Good.sol': GOOD, 'Bad.sol': BAD})
+
+    assert list(results) == ['Good.sol', 'Bad.sol']
+    assert results['Good.sol']['status'] == 'success'
+    assert results['Good.sol']['bytecode'] == 'Good.sol-bytecode'
+    assert results['Good.sol']['ast'] == {'absolutePath': 'Good.sol'}
+    assert results['Bad.sol']['status'] == 'error'
+    assert results['Bad.sol']['message'] == 'ParserError: Expected expression'
+    assert results['Bad.sol']['diagnostics'][0]['start_line'] == 1
+    # The error-free source is compiled again on its own
+    assert solc.inputs == [['Bad.sol', 'Good.sol'], ['Good.sol']]
+
+
+def test_unlocated_errors_fail_every_source(monkeypatch):
+    def compile_standard(input_data, solc_version):
+        raise SolcError('solc crashed', stdout_data='not json')
+    monkeypatch.setattr(main, 'compile_standard', compile_standard)
+
+    results = compile_batch({'Good.sol': GOOD, 'Other.sol': GOOD})
+
+    assert [result['status'] for result in results.values()] == ['error', 'error']
+
+
+def test_successful_sources_are_cached(solc, inline_pool):
+    first = asyncio.run(acompile_batch({'Good.sol': GOOD, 'Bad.sol': BAD}))
+    second = asyncio.run(acompile_batch({'Good.sol': GOOD, 'Bad.sol': BAD}))
+
+    assert second == first
+    # Only the failing source is sent to solc again
+    assert solc.inputs == [['Bad.sol', 'Good.sol'], ['Good.sol'], ['Bad.sol']]
+
+
+def test_sources_with_imports_are_not_cached(solc, inline_pool):
+    asyncio.run(acompile_batch({'Good.sol': GOOD, 'Child.sol': IMPORTER}))
+    asyncio.run(acompile_batch({'Good.sol': GOOD, 'Child.sol': IMPORTER}))
+
+    assert solc.inputs == [['Child.sol', 'Good.sol'], ['Child.sol']]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'get_installed_solc_versions', lambda: ['0.8.20'])
+    return TestClient(main.app)
+
+
+def test_endpoint_rejects_too_many_sources(client, monkeypatch):
+    monkeypatch.setattr(main, 'COMPILE_BATCH_MAX_SOURCES', 2)
+    response = client.post('/compile-batch', json={'sources': {f'{index}.sol': GOOD for index in range(3)}})
+
+    assert response.status_code == 413
+
+
+def test_endpoint_rejects_oversized_sources(client, monkeypatch):
+    monkeypatch.setattr(main, 'COMPILE_BATCH_MAX_BYTES', 100)
+    response = client.post('/compile-batch', json={'sources': {'Big.sol': 'x' * 101}})
+
+    assert response.status_code == 413
+
+
+def test_endpoint_rejects_compilers_that_are_not_installed(client):
+    response = client.post('/compile-batch', json={'sources': {'Good.sol': GOOD}, 'solc_version': '0.4.0'})
+
+    assert response.status_code == 400
+    assert '0.8.20' in response.json()['detail']
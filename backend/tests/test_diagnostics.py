@@ -0,0 +1,57 @@
+from main import offset_to_position, parse_diagnostics
+
+SOURCE = 'pragma solidity ^0.8.0;\n\ncontract Token {\n    uint x = ;\n}\n'
+
+
+def test_offsets_become_one_based_lines_and_columns():
+    source_bytes = SOURCE.encode()
+
+    assert offset_to_position(source_bytes, 0) == (1, 1)
+    assert offset_to_position(source_bytes, SOURCE.index('contract')) == (3, 1)
+    assert offset_to_position(source_bytes, SOURCE.index(';\n}')) == (4, 14)
+
+
+def test_offsets_are_bytes_and_columns_are_characters():
+    source = '// café ☕\nuint x;\n'
+    source_bytes = source.encode()
+
+    assert offset_to_position(source_bytes, source_bytes.index(b'\n')) == (1, 10)
+    assert offset_to_position(source_bytes, source_bytes.index(b'x')) == (2, 6)
+
+
+def test_negative_offset_is_the_start():
+    assert offset_to_position(SOURCE.encode(), -1) == (1, 1)
+
+
+def test_diagnostics_carry_ranges():
+    start = SOURCE.index(';\n}')
+    diagnostics = parse_diagnostics(SOURCE, [{
+        'severity': 'error',
+        'type': 'ParserError',
+        'message': 'Expected expression.',
+        'formattedMessage': 'ParserError: Expected expression.',
+        'sourceLocation': {'file': 'contract.sol', 'start': start, 'end': start + 1}
+    }])
+
+    assert diagnostics == [{
+        'severity': 'error',
+        'type': 'ParserError',
+        'message': 'Expected expression.',
+        'formatted_message': 'ParserError: Expected expression.',
+        'file': 'contract.sol',
+        'start_line': 4,
+        'start_column': 14,
+        'end_line': 4,
+        'end_column': 15
+    }]
+
+
+def test_diagnostics_without_a_location_have_no_range():
+    diagnostics = parse_diagnostics(SOURCE, [
+        {'severity': 'warning', 'type': 'Warning', 'message': 'No SPDX license identifier.'},
+        {'type': 'Warning', 'message': 'Unknown', 'sourceLocation': {'file': 'contract.sol', 'start': -1, 'end': -1}},
+    ])
+
+    assert [diagnostic['severity'] for diagnostic in diagnostics] == ['warning', 'error']
+    assert diagnostics[0]['formatted_message'] == 'No SPDX license identifier.'
+    assert all('start_line' not in diagnostic for diagnostic in diagnostics)
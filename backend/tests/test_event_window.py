@@ -0,0 +1,182 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from main import EventWindow, TransferIndex
+
+ALICE = '0x' + 'a' * 40
+BOB = '0x' + 'b' * 40
+CAROL = '0x' + 'c' * 40
+
+
+def rows(*transfers):
+    """(block, tx_hash, sender, recipient, value, gas_used) rows"""
+    return list(transfers)
+
+
+def test_block_counts_span_to_the_head():
+    window = EventWindow(start_block=10, head_block=15)
+    window.append(rows((11, '0x1', ALICE, BOB, 1, 21000), (11, '0x2', ALICE, BOB, 1, 21000), (13, '0x3', BOB, ALICE, 1, 21000)))
+
+    assert window.block_counts().tolist() == [0, 2, 0, 1, 0, 0]
+
+
+def test_gas_is_counted_once_per_transaction():
+    window = EventWindow(0, 1)
+    # One transaction emitting two transfers, and one without a receipt
+    window.append(rows((1, '0x1', ALICE, BOB, 5, 50000), (1, '0x1', BOB, CAROL, 5, 50000), (1, '0x2', ALICE, CAROL, 1, None)))
+
+    assert window.tx_gas_used().tolist() == [50000]
+
+
+def test_rolling_volume_and_zscore():
+    window = EventWindow(0, 9)
+    window.append(rows(*[(block, f'0x{block}', ALICE, BOB, 1, None) for block in range(8)]))
+    window.append(rows(*[(9, f'0x9{index}', ALICE, BOB, 1, None) for index in range(6)]))
+
+    rolling = window.rolling_volume(2)
+    assert rolling.tolist() == [2, 2, 2, 2, 2, 2, 2, 1, 6]
+    assert window.volume_zscore(2) == pytest.approx((6 - rolling.mean()) / rolling.std())
+
+
+def test_zscore_is_zero_for_flat_volume():
+    window = EventWindow(0, 3)
+    window.append(rows(*[(block, f'0x{block}', ALICE, BOB, 1, None) for block in range(4)]))
+
+    assert window.volume_zscore(2) == 0.0
+
+
+def test_top_senders_and_value_outliers():
+    window = EventWindow(0, 0)
+    window.append(rows(*[(0, f'0x{index}', ALICE, BOB, 10, None) for index in range(29)]))
+    window.append(rows((0, '0xbig', BOB, CAROL, 10 ** 30, None)))
+
+    assert window.top_senders(limit=2) == [
+        {'address': ALICE, 'transfers': 29, 'share': pytest.approx(29 / 30)},
+        {'address': BOB, 'transfers': 1, 'share': pytest.approx(1 / 30)},
+    ]
+    assert window.value_outliers(3.0) == 1
+
+
+def test_retain_drops_old_and_reread_blocks_and_compacts_addresses():
+    window = EventWindow(0, 2000)
+    window.append(rows(*[(block, f'0x{block}', f'0x{block:040x}', BOB, 1, None) for block in range(2000)]))
+    window.retain(1990, before_block=1995)
+
+    assert window.blocks.tolist() == [1990, 1991, 1992, 1993, 1994]
+    assert len(window.addresses) == 6
+    assert [window.addresses[code] for code in window.senders] == [f'0x{block:040x}' for block in range(1990, 1995)]
+    assert window.start_block == 1990
+
+
+class FakeEth:
+    def __init__(self, chain):
+        self.chain = chain
+
+    @property
+    async def block_number(self):
+        return self.chain.head
+
+    @property
+    async def chain_id(self):
+        return 1
+
+    async def get_logs(self, params):
+        return [log for log in self.chain.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.chain.receipts += 1
+        return {'gasUsed': 21000}
+
+
+class FakeTransfer:
+    def process_log(self, log):
+        return {'args': log['args']}
+
+
+class FakeChain:
+    def __init__(self):
+        self.head = 0
+        self.logs = []
+        self.receipts = 0
+
+    def transfer(self, block, sender, recipient, value):
+        index = len(self.logs)
+        self.logs.append({
+            'blockNumber': block,
+            'logIndex': index,
+            'transactionHash': bytes([index]) * 32,
+            'args': {'from': sender, 'to': recipient, 'value': value}
+        })
+
+
+class FakeContract:
+    address = '0x' + 'd' * 40
+
+    def __init__(self, chain):
+        self.w3 = type('W3', (), {'eth': FakeEth(chain)})()
+        self.events = type('Events', (), {'Transfer': FakeTransfer})()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'transfers.sqlite3')
+
+
+def open_index(db_path, **kwargs):
+    index = TransferIndex(db_path, reorg_margin=2, **kwargs)
+    index.open()
+    return index
+
+
+def test_sync_reuses_stored_receipts(db_path):
+    chain = FakeChain()
+    contract = FakeContract(chain)
+    index = open_index(db_path)
+    chain.head = 10
+    chain.transfer(9, ALICE, BOB, 5)
+    asyncio.run(index.sync(contract, 100))
+    chain.head = 11
+    window = asyncio.run(index.sync(contract, 100))
+
+    # Block 9 is re-read for the reorg margin, but its receipt is already stored
+    assert chain.receipts == 1
+    assert window.tx_gas_used().tolist() == [21000]
+
+
+def test_window_reloads_when_another_process_moved_the_cursor(db_path):
+    chain = FakeChain()
+    contract = FakeContract(chain)
+    first, second = open_index(db_path), open_index(db_path)
+    chain.head = 100
+    chain.transfer(99, ALICE, BOB, 1)
+    asyncio.run(first.sync(contract, 100))
+
+    # Another worker indexes block 103, then the cursor moves past its reorg margin
+    chain.transfer(103, BOB, CAROL, 2)
+    chain.head = 105
+    asyncio.run(second.sync(contract, 100))
+    chain.head = 108
+    window = asyncio.run(first.sync(contract, 100))
+
+    assert window.blocks.tolist() == [99, 103]
+    assert window.head_block == 108
+    assert np.asarray(window.block_counts()).sum() == 2
+
+
+def test_idle_windows_are_evicted_and_forget_drops_everything(db_path):
+    chain = FakeChain()
+    contract = FakeContract(chain)
+    index = open_index(db_path, idle_ttl=0)
+    chain.head = 10
+    chain.transfer(9, ALICE, BOB, 5)
+    asyncio.run(index.sync(contract, 100))
+
+    index.evict_idle(float('inf'))
+    assert index.windows == {}
+
+    asyncio.run(index.sync(contract, 100))
+    index.forget(1, contract.address)
+    assert index.windows == {}
+    assert index.cursor(1, contract.address.lower()) is None
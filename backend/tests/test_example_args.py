@@ -0,0 +1,59 @@
+import pytest
+from web3 import Web3
+
+from main import coerce_example_value, example_arguments
+
+ONE_TOKEN = '1000000000000000000'
+
+
+@pytest.mark.parametrize('param_type, expected', [
+    ('uint8', 2 ** 8 - 1),
+    ('uint32', 2 ** 32 - 1),
+    ('uint64', 10 ** 18),
+    ('uint', 10 ** 18),
+    ('uint256', 10 ** 18),
+])
+def test_unsigned_values_are_clamped_to_the_bit_width(param_type, expected):
+    assert coerce_example_value(param_type, ONE_TOKEN) == expected
+
+
+@pytest.mark.parametrize('param_type, expected', [
+    ('int8', 2 ** 7 - 1),
+    ('int32', 2 ** 31 - 1),
+    ('int56', 2 ** 55 - 1),
+    ('int64', 10 ** 18),
+    ('int', 10 ** 18),
+])
+def test_signed_values_are_clamped_to_the_bit_width(param_type, expected):
+    assert coerce_example_value(param_type, ONE_TOKEN) == expected
+
+
+def test_signed_placeholder_becomes_one():
+    assert coerce_example_value('int256', '<int256>') == 1
+
+
+def test_arrays_repeat_the_element_value():
+    assert coerce_example_value('uint8[3]', ONE_TOKEN) == [255, 255, 255]
+    assert coerce_example_value('uint16[]', ONE_TOKEN) == [2 ** 16 - 1]
+
+
+def test_example_arguments_are_abi_encodable():
+    inputs = [
+        {'name': 'small', 'type': 'uint8'},
+        {'name': 'delta', 'type': 'int16'},
+        {'name': 'to', 'type': 'address'},
+        {'name': 'flags', 'type': 'bool[2]'},
+        {'name': 'id', 'type': 'bytes32'},
+        {'name': '', 'type': 'string'},
+    ]
+    values = example_arguments(inputs)
+
+    encoded = Web3().codec.encode([param['type'] for param in inputs], values)
+    assert Web3().codec.decode([param['type'] for param in inputs], encoded) == (
+        255, 1, '0x742d35cc6634c0532925a3b844bc454e4438f44e', (True, True), b'\x00' * 32, 'example_string'
+    )
+
+
+def test_tuples_have_no_example_value():
+    with pytest.raises(ValueError):
+        coerce_example_value('tuple', '<tuple>')
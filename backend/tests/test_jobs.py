@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from main import JobManager, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.open()
+    yield store
+    store.close()
+
+
+def status_event(agent, status):
+    return "event: status\ndata: " + json.dumps({'agent': agent, 'action': 'Test', 'status': status}) + "\n\n"
+
+
+def delta_event(token):
+    return "event: delta\ndata: " + json.dumps({
+        'agent': 'Developer', 'action': 'Generating contract', 'status': 'streaming', 'delta': token
+    }) + "\n\n"
+
+
+def replay(manager, job_id, last_event_id):
+    async def collect():
+        return [event async for event in manager.stream_events(job_id, last_event_id)]
+    return asyncio.run(collect())
+
+
+def test_events_replay_after_last_event_id(store):
+    job_id = store.create_job('token', bypass_cache=False)
+    store.append_events(job_id, [(1, 'status', '{"n": 1}'), (2, 'status', '{"n": 2}'), (3, 'delta', '{"n": 3}')])
+    store.set_status(job_id, 'completed')
+
+    assert store.get_job(job_id)['last_event_id'] == 3
+    assert replay(JobManager(store, 1, 10), job_id, 1) == [
+        'id: 2\nevent: status\ndata: {"n": 2}\n\n',
+        'id: 3\nevent: delta\ndata: {"n": 3}\n\n',
+    ]
+
+
+def test_events_survive_reopening_the_database(store):
+    job_id = store.create_job('token', bypass_cache=True, tune_optimizer=True)
+    store.append_event(job_id, 'status', '{"n": 1}')
+    store.close()
+    store.open()
+
+    job = store.get_job(job_id)
+    assert (job['bypass_cache'], job['tune_optimizer'], job['last_event_id']) == (True, True, 1)
+    assert store.events_after(job_id, 0) == [(1, 'status', '{"n": 1}')]
+
+
+def test_run_job_merges_deltas_and_fails_on_recovery(store, monkeypatch):
+    async def pipeline(prompt, bypass_cache, tune_optimizer):
+        yield status_event('RequirementsParser', 'completed')
+        for token in ('con', 'tract'):
+            yield delta_event(token)
+        yield status_event('ErrorRecovery', 'recovering')
+
+    monkeypatch.setattr(main, 'stream_contract_generation', pipeline)
+    manager = JobManager(store, 1, 10)
+    job_id = store.create_job('token', bypass_cache=False)
+
+    async def run():
+        manager.updated = asyncio.Condition()
+        await manager.run_job(job_id)
+    asyncio.run(run())
+
+    events = store.events_after(job_id, 0)
+    assert [event_type for _, event_type, _ in events] == ['status', 'delta', 'status']
+    assert json.loads(events[1][2])['delta'] == 'contract'
+    assert store.get_job(job_id)['status'] == 'failed'
+
+
+def test_final_status():
+    assert JobManager.final_status('completed', 'status', json.dumps({'agent': 'Optimizer', 'status': 'completed'})) == 'completed'
+    assert JobManager.final_status('completed', 'error', json.dumps({'status': 'failed'})) == 'failed'
+    assert JobManager.final_status('completed', 'status', json.dumps({'agent': 'ErrorRecovery', 'status': 'failed'})) == 'failed'
+    assert JobManager.final_status('completed', 'status', json.dumps({'agent': 'ErrorRecovery', 'status': 'success'})) == 'completed'
+
+
+def test_start_interrupts_jobs_it_cannot_resume_or_requeue(store):
+    running = store.create_job('running', bypass_cache=False)
+    store.set_status(running, 'running')
+    queued = [store.create_job(f'queued {index}', bypass_cache=False) for index in range(3)]
+    manager = JobManager(store, max_workers=0, max_queue=2)
+
+    async def start():
+        await manager.start()
+        return manager.queue.qsize()
+    assert asyncio.run(start()) == 2
+
+    assert store.get_job(running)['status'] == 'interrupted'
+    assert [store.get_job(job_id)['status'] for job_id in queued] == ['queued', 'queued', 'interrupted']
+    assert store.events_after(queued[2], 0)[0][1] == 'error'
@@ -0,0 +1,150 @@
+import asyncio
+
+from web3 import Web3
+
+import main
+from main import RpcCache, batch_read_view_functions
+
+CHAIN = 1
+TOKEN = '0x' + 'd' * 40
+
+
+def block_hash(number, fork=''):
+    return '0x' + f'{fork}{number}'.rjust(64, '0')
+
+
+def advance(cache, number, fork=''):
+    cache.observe_head(CHAIN, number, block_hash(number, fork), block_hash(number - 1, fork))
+
+
+def cached_blocks(cache):
+    return sorted(key[2] for key in cache.entries)
+
+
+def test_head_advance_drops_entries_outside_the_reorg_window():
+    cache = RpcCache(reorg_depth=3)
+    advance(cache, 10)
+    for block in range(5, 11):
+        cache.put(CHAIN, TOKEN, block, b'\x01', (True, b''))
+    advance(cache, 11)
+
+    assert cached_blocks(cache) == [8, 9, 10]
+    assert cache.get(CHAIN, Web3.to_checksum_address(TOKEN), 10, '0x01') == (True, b'')
+
+
+def test_reorg_drops_entries_inside_the_reorg_window():
+    cache = RpcCache(reorg_depth=3)
+    advance(cache, 10)
+    for block in range(8, 11):
+        cache.put(CHAIN, TOKEN, block, b'\x01', (True, b''))
+    # Same height, different hash
+    advance(cache, 10, fork='f')
+
+    assert cache.reorgs == 1
+    assert cached_blocks(cache) == []
+
+
+def test_head_moving_backwards_is_a_reorg():
+    cache = RpcCache(reorg_depth=3)
+    advance(cache, 10)
+    cache.put(CHAIN, TOKEN, 6, b'\x01', (True, b''))
+    cache.put(CHAIN, TOKEN, 9, b'\x01', (True, b''))
+    advance(cache, 9, fork='f')
+
+    assert cache.reorgs == 1
+    assert cached_blocks(cache) == [6]
+
+
+def test_other_chains_are_untouched_by_a_reorg():
+    cache = RpcCache(reorg_depth=3)
+    advance(cache, 10)
+    cache.put(CHAIN, TOKEN, 10, b'\x01', (True, b''))
+    cache.put(CHAIN + 1, TOKEN, 10, b'\x01', (True, b''))
+    advance(cache, 10, fork='f')
+
+    assert list(cache.entries) == [RpcCache.make_key(CHAIN + 1, TOKEN, 10, b'\x01')]
+
+
+class CodeEth:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_code(self, address):
+        self.calls += 1
+        return b'\x60\x80' if address != TOKEN else b''
+
+
+def test_code_cache_is_a_bounded_lru():
+    cache = RpcCache(max_code_entries=2)
+    eth = CodeEth()
+    w3 = type('W3', (), {'eth': eth})()
+    first, second, third = ('0x' + digit * 40 for digit in '123')
+
+    async def read(*addresses):
+        for address in addresses:
+            await cache.get_code(CHAIN, w3, address)
+    asyncio.run(read(first, second, first, third, first))
+
+    assert eth.calls == 3
+    assert list(cache.code) == [(CHAIN, third), (CHAIN, first)]
+
+    # Empty code is never cached
+    asyncio.run(read(TOKEN, TOKEN))
+    assert eth.calls == 5
+
+
+class NoMulticall:
+    """Multicall3 is not deployed, so every aggregate3 call fails"""
+
+    @property
+    def functions(self):
+        return self
+
+    def aggregate3(self, calls):
+        return self
+
+    async def call(self, block_identifier):
+        raise ValueError('execution reverted')
+
+
+class FallbackEth:
+    def __init__(self):
+        self.calls = []
+
+    def contract(self, address, abi):
+        return NoMulticall()
+
+    async def call(self, transaction, block_identifier):
+        self.calls.append((transaction['data'], block_identifier))
+        return Web3().codec.encode(['uint256'], [42])
+
+
+class FakeFunction:
+    abi = {'name': 'totalSupply', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'type': 'uint256'}]}
+
+    def __call__(self):
+        return self
+
+    def _encode_transaction_data(self):
+        return '0x18160ddd'
+
+
+class FakeContract:
+    address = TOKEN
+
+    def all_functions(self):
+        return [FakeFunction()]
+
+
+def test_fallback_reads_are_cached_per_pinned_block(monkeypatch):
+    monkeypatch.setattr(main, 'rpc_cache', RpcCache())
+    eth = FallbackEth()
+    w3 = type('W3', (), {'eth': eth, 'codec': Web3().codec})()
+
+    async def read(block_number):
+        return await batch_read_view_functions(w3, FakeContract(), block_number, chain_id=CHAIN)
+    assert asyncio.run(read(100)) == [{'name': 'totalSupply', 'type': 'view', 'result': 42}]
+    asyncio.run(read(100))
+    asyncio.run(read(101))
+
+    assert eth.calls == [('0x18160ddd', 100), ('0x18160ddd', 101)]
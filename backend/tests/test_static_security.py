@@ -0,0 +1,164 @@
+from main import StaticSecurityAnalyzer
+
+OWNER_ID = 1
+BALANCES_ID = 2
+MINTERS_ID = 3
+
+
+def ident(name, ref=None):
+    node = {'nodeType': 'Identifier', 'name': name}
+    if ref is not None:
+        node['referencedDeclaration'] = ref
+    return node
+
+
+def member(base, name):
+    return {'nodeType': 'MemberAccess', 'memberName': name, 'expression': base}
+
+
+def sender():
+    return member(ident('msg'), 'sender')
+
+
+def call(name, *arguments):
+    return {'nodeType': 'FunctionCall', 'kind': 'functionCall', 'expression': ident(name), 'arguments': list(arguments)}
+
+
+def binary(operator, left, right):
+    return {'nodeType': 'BinaryOperation', 'operator': operator, 'leftExpression': left, 'rightExpression': right}
+
+
+def index(base, key):
+    return {'nodeType': 'IndexAccess', 'baseExpression': base, 'indexExpression': key}
+
+
+def statement(expression):
+    return {'nodeType': 'ExpressionStatement', 'expression': expression}
+
+
+def function(name, *statements, modifiers=(), visibility='public'):
+    return {
+        'nodeType': 'FunctionDefinition',
+        'name': name,
+        'kind': 'function',
+        'visibility': visibility,
+        'stateMutability': 'nonpayable',
+        'modifiers': [{'nodeType': 'ModifierInvocation', 'modifierName': {'name': m}} for m in modifiers],
+        'body': {'nodeType': 'Block', 'statements': list(statements)}
+    }
+
+
+def contract(*functions):
+    state = [
+        {'nodeType': 'VariableDeclaration', 'id': OWNER_ID, 'name': 'owner', 'stateVariable': True},
+        {'nodeType': 'VariableDeclaration', 'id': BALANCES_ID, 'name': 'balances', 'stateVariable': True},
+        {'nodeType': 'VariableDeclaration', 'id': MINTERS_ID, 'name': 'minters', 'stateVariable': True},
+    ]
+    return {'nodeType': 'SourceUnit', 'nodes': [
+        {'nodeType': 'ContractDefinition', 'name': 'Token', 'nodes': state + list(functions)}
+    ]}
+
+
+def analyze(*functions):
+    return StaticSecurityAnalyzer().analyze(contract(*functions), '')
+
+
+def issues(result):
+    return [(finding['issue'], finding['function']) for finding in result['critical_issues']]
+
+
+def test_clean_prescreen_is_not_conclusive():
+    result = analyze(function('setOwner', statement({
+        'nodeType': 'Assignment', 'operator': '=',
+        'leftHandSide': ident('owner', OWNER_ID), 'rightHandSide': ident('newOwner')
+    })))
+
+    assert result['critical_issues'] == []
+    assert result['conclusive'] is False
+
+
+def test_unprotected_mint_is_critical_and_conclusive():
+    result = analyze(function('mint', statement(call('_mint', ident('to'), ident('amount')))))
+
+    assert issues(result) == [('missing_access_control', 'mint')]
+    assert result['conclusive'] is True
+
+
+def test_self_burn_is_not_flagged():
+    result = analyze(function('burn', statement(call('_burn', sender(), ident('amount')))))
+
+    assert result['critical_issues'] == []
+
+
+def test_self_burn_through_balance_mapping_is_not_flagged():
+    result = analyze(function('burn', statement({
+        'nodeType': 'Assignment', 'operator': '-=',
+        'leftHandSide': index(ident('balances', BALANCES_ID), sender()), 'rightHandSide': ident('amount')
+    })))
+
+    assert result['critical_issues'] == []
+
+
+def test_burning_another_account_is_flagged():
+    result = analyze(function('burn', statement(call('_burn', ident('account'), ident('amount')))))
+
+    assert issues(result) == [('missing_access_control', 'burn')]
+
+
+def test_owner_comparison_in_require_is_access_control():
+    result = analyze(function(
+        'mint',
+        statement(call('require', binary('==', sender(), ident('owner', OWNER_ID)))),
+        statement(call('_mint', ident('to'), ident('amount')))
+    ))
+
+    assert result['critical_issues'] == []
+
+
+def test_role_mapping_lookup_is_access_control():
+    result = analyze(function(
+        'mint',
+        statement(call('require', index(ident('minters', MINTERS_ID), sender()))),
+        statement(call('_mint', ident('to'), ident('amount')))
+    ))
+
+    assert result['critical_issues'] == []
+
+
+def test_modifier_is_access_control():
+    result = analyze(function('mint', statement(call('_mint', ident('to'), ident('amount'))), modifiers=['onlyOwner']))
+
+    assert result['critical_issues'] == []
+
+
+def test_sender_nonzero_check_is_not_access_control():
+    result = analyze(function('mint', {
+        'nodeType': 'IfStatement',
+        'condition': binary('!=', sender(), call('address', {'nodeType': 'Literal', 'value': '0'})),
+        'trueBody': statement(call('_mint', ident('to'), ident('amount')))
+    }))
+
+    assert issues(result) == [('missing_access_control', 'mint')]
+
+
+def test_sender_in_if_body_is_not_access_control():
+    result = analyze(function('mint', {
+        'nodeType': 'IfStatement',
+        'condition': ident('enabled'),
+        'trueBody': statement(call('_mint', sender(), binary('==', sender(), ident('owner', OWNER_ID))))
+    }))
+
+    assert issues(result) == [('missing_access_control', 'mint')]
+
+
+def test_tx_origin_authorization_is_critical():
+    result = analyze(function(
+        'withdraw',
+        statement(call('require', binary('==', member(ident('tx'), 'origin'), ident('owner', OWNER_ID))))
+    ))
+
+    assert issues(result) == [('tx_origin_auth', 'withdraw')]
+
+
+def test_missing_ast_is_not_conclusive():
+    assert StaticSecurityAnalyzer().analyze(None, '')['conclusive'] is False